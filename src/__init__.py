@@ -0,0 +1,39 @@
+"""
+Generación de gráficos de piezómetros para el reporte Excel.
+
+Las funciones principales se exponen desde el paquete, pero cada módulo se importa
+solo la primera vez que se accede a él. De este modo, tareas cortas como consultar
+umbrales o refrescar datos no cargan matplotlib, scipy ni openpyxl.
+"""
+import importlib
+
+# Nombre exportado -> (módulo, atributo)
+_EXPORTS = {
+    "connect_to_db": ("db_connection", "connect_to_db"),
+    "execute_query": ("db_connection", "execute_query"),
+    "close_connection": ("db_connection", "close_connection"),
+    "process_data": ("data_processing", "process_data"),
+    "process_precipitation_data": ("data_processing", "process_precipitation_data"),
+    "ubicaciones": ("ubicaciones_config", "ubicaciones"),
+    "obtener_instrumento": ("registro_instrumentos", "obtener_instrumento"),
+    "instrumentos_por_hoja": ("registro_instrumentos", "instrumentos_por_hoja"),
+    "ordenar_por_hoja": ("registro_instrumentos", "ordenar_por_hoja"),
+    "plotter_instrumento": ("registro_instrumentos", "plotter_instrumento"),
+    "guardar_graficos_en_lote": ("utilidades_excel", "guardar_graficos_en_lote"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+    modulo, atributo = _EXPORTS[nombre]
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), atributo)
+    globals()[nombre] = valor  # Cachear para los siguientes accesos
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,45 @@
+from .registro_instrumentos import hojas_registro
+
+# Borde derecho medio del reporte: columna 45 (AS), filas 2 a 61
+MIN_ROW = 2
+MAX_ROW = 61
+COL = 45
+
+# Hojas del reporte que llevan el borde (lista original de aplicar_bordes.ipynb).
+# Es explícita porque no coincide con las hojas del registro: incluye hojas sin
+# instrumento registrado (PC22-11-T, PC22-15-T) y nombres de hoja propios (PA24-04-A-T).
+HOJAS_BORDES = [
+    "PA22-01-T", "PA22-02-T", "PA22-06-T", "PA22-07-T",
+    "PA22-09-T", "PA22-10-T", "PA22-12-T", "PC22-03-T",
+    "PC22-04-T", "PC22-05-T", "PC22-08-T", "PC22-11-T",
+    "PC22-14-T", "PC22-15-T", "PC23-01-T", "PC23-02-T_PC23-02A-T",
+    "PC23-04-T", "PC23-05-T", "PC23-06-T", "PC23-07-T",
+    "PC23-09-T", "PC23-10-T", "PC23-15A-T_PC23-15B-T", "PC23-16-T",
+    "PC23-19-T", "PC23-23-T", "PC23-24-T", "PC23-25-T",
+    "PC23-26-T", "PC24-03-T", "PC24-04-T", "PA23-03-T",
+    "PA23-08-T", "PA23-11-T", "PA23-12-T", "PA23-13-T",
+    "PA23-14-T", "PA23-17A-T", "PA23-18-T", "PA23-20A-T",
+    "PA23-21-T", "PA23-22-T", "PA23-27-T", "PA23-28-T",
+    "PA23-29-T", "PA23-30-T", "PA24-01-A-T", "PA24-02-A-T",
+    "PA24-05-A-T", "PA24-10-A-T", "PA24-28-T", "PA24-FT-128-T",
+    "PA24-11-T", "PA24-01-S", "PA24-02-S", "PA24-03-S",
+    "PA24-04-S", "PA24-05-S", "PA24-01-T", "PA24-02-T",
+    "PA24-03-T", "PA24-04-A-T", "PA24-05-T", "PA24-06-T",
+    "PA24-07-T", "PA24-08-T", "PA24-09-T", "PA24-10-T",
+    "PA24-12-T", "PA24-03-A-T"
+]
+
+
+def hojas_bordes():
+    """
+    Hojas a las que se aplica el borde: la lista explícita más las hojas del registro
+    que no figuran en ella (las que no existan en el Excel se omiten con un aviso).
+    """
+    return HOJAS_BORDES + [hoja for hoja in hojas_registro() if hoja not in HOJAS_BORDES]
+
+
+def bordes_reporte():
+    """
+    Argumentos de formato del reporte para guardar_graficos_en_lote(bordes=...).
+    """
+    return {"hojas": hojas_bordes(), "min_row": MIN_ROW, "max_row": MAX_ROW, "col": COL}
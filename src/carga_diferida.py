@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+# Presupuesto de importación (segundos) de los módulos que usan las tareas cortas.
+# Ninguno de ellos debe cargar las dependencias pesadas al importarse.
+PRESUPUESTO_IMPORTACION = {
+    'src': 0.5,
+    'src.obtener_umbrales': 0.5,
+    'src.registro_instrumentos': 0.5,
+    'src.resumen_diario': 0.5,
+    'src.plotter_abiertos': 1.0,
+    'src.plotter_cerrados': 1.0,
+}
+
+MODULOS_PESADOS = ('matplotlib', 'scipy', 'openpyxl')
+
+
+def seleccionar_backend_agg():
+    """
+    Selecciona el backend Agg de matplotlib antes de importarlo, sin cargar matplotlib.
+
+    Así se evita que matplotlib pruebe los backends gráficos (Tk, Qt...) al importar
+    pyplot en ejecuciones por consola. En notebooks no se modifica nada para que
+    plt.show() siga mostrando los gráficos en línea.
+
+    Retorna:
+        bool: True si se seleccionó Agg, False si se respetó la configuración existente
+    """
+    if 'matplotlib.pyplot' in sys.modules or 'ipykernel' in sys.modules:
+        return False
+    if os.environ.get('MPLBACKEND'):
+        return False
+
+    os.environ['MPLBACKEND'] = 'Agg'
+    return True
+
+
+def _medir_importacion(modulo):
+    codigo = (
+        "import sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"import {modulo}\n"
+        "print(time.perf_counter() - t0)\n"
+        f"print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))\n"
+    )
+    salida = subprocess.run(
+        [sys.executable, '-c', codigo],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    segundos, pesados = salida.stdout.split('\n')[-3:-1]
+    return float(segundos), [m for m in pesados.split(',') if m]
+
+
+def tiempo_importacion(modulo):
+    """
+    Mide el tiempo de importación de un módulo en un intérprete nuevo.
+
+    Parámetros:
+        modulo : Nombre del módulo a importar (ej. 'src.data_processing')
+
+    Retorna:
+        float: Segundos empleados en la importación
+    """
+    return _medir_importacion(modulo)[0]
+
+
+def comprobar_presupuesto(presupuesto=PRESUPUESTO_IMPORTACION):
+    """
+    Importa cada módulo en un intérprete nuevo y comprueba que no supere su presupuesto
+    de tiempo ni cargue matplotlib, scipy u openpyxl.
+
+    Parámetros:
+        presupuesto : {módulo: segundos máximos}
+
+    Retorna:
+        list: Mensajes de los módulos que no cumplen (vacía si todos cumplen)
+    """
+    fallos = []
+    for modulo, limite in presupuesto.items():
+        segundos, pesados = _medir_importacion(modulo)
+        estado = 'OK'
+        if segundos > limite:
+            estado = 'LENTO'
+            fallos.append(f"{modulo}: {segundos:.3f} s > {limite} s")
+        if pesados:
+            estado = 'PESADO'
+            fallos.append(f"{modulo}: importa {', '.join(pesados)}")
+        print(f"{modulo:<28}{segundos:>8.3f} s  (máx. {limite} s)  {estado}")
+    return fallos
+
+
+def importar_matplotlib():
+    """
+    Importa los módulos de matplotlib usados por los plotters en la primera llamada.
+
+    Retorna:
+        tuple: (pyplot, dates, ticker, Line2D)
+    """
+    seleccionar_backend_agg()
+
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    import matplotlib.ticker as ticker
+    from matplotlib.lines import Line2D
+
+    return plt, mdates, ticker, Line2D
+
+
+if __name__ == '__main__':
+    # python -m src.carga_diferida: falla si algún módulo supera su presupuesto de importación
+    fallos = comprobar_presupuesto()
+    for fallo in fallos:
+        print(f"✗ {fallo}")
+    sys.exit(1 if fallos else 0)
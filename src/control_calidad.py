@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+
+def control_calidad(df, ventana=7, umbral_mad=8.0, desviacion_min=1.0, dias_pegado=7, max_hueco_dias=10,
+                    colapsar_duplicados=True, eliminar_picos=True, marcar_pegados=True, segmentar=True):
+    """
+    Limpia las series de todos los instrumentos de una sola vez (operaciones vectorizadas
+    por grupo, sin iterar instrumento por instrumento).
+
+    Etapas (cada una se puede desactivar):
+        1. colapsar_duplicados: une registros con la misma fecha_hora por instrumento
+           (se conserva el último).
+        2. segmentar: agrega la columna 'segmento', que aumenta cada vez que entre dos
+           lecturas pasan más de max_hueco_dias (o más de 3 veces el intervalo habitual
+           del instrumento, si es mayor). Los plotters cortan la línea entre segmentos en
+           lugar de interpolar a través del hueco. Se calcula antes de quitar picos para
+           que un pico eliminado no genere un hueco falso.
+        3. eliminar_picos: elimina solo picos aislados, es decir, lecturas que se alejan de
+           la mediana móvil más de umbral_mad * MAD de los residuos del instrumento y más
+           de desviacion_min, cuando ninguna de sus dos vecinas se aleja también. Un cambio
+           real que dura varias lecturas no se elimina, ni la primera o última lectura.
+        4. marcar_pegados: agrega la columna booleana 'pegado', True en las lecturas que
+           repiten el mismo valor desde hace dias_pegado días o más. Las lecturas no se
+           eliminan (una serie estable o redondeada se grafica completa); los plotters
+           las resaltan con un marcador aparte para que se revisen.
+
+    Parámetros:
+        df                  : DataFrame de process_data (id_instrumento, date_time, elevacion_piezometrica)
+        ventana             : Número de lecturas de la ventana móvil (centrada)
+        umbral_mad          : Múltiplo de la MAD de los residuos a partir del cual una lectura es atípica
+        desviacion_min      : Desviación mínima (m) para considerar un pico, evita falsos
+                              positivos en series casi planas donde la MAD es 0
+        dias_pegado         : Duración (días) de un mismo valor a partir de la cual se marca como pegado
+        max_hueco_dias      : Separación mínima (días) para iniciar un nuevo segmento
+        colapsar_duplicados : Activar la etapa 1
+        eliminar_picos      : Activar la etapa 3
+        marcar_pegados      : Activar la etapa 4
+        segmentar           : Activar la etapa 2
+
+    Retorna:
+        DataFrame: Datos ordenados por instrumento y fecha, con las columnas 'segmento'
+                   y 'pegado' según las etapas activas
+    """
+    if df.empty:
+        return df
+
+    df = df.dropna(subset=['date_time', 'elevacion_piezometrica'])
+    df = df.sort_values(['id_instrumento', 'date_time'], kind='mergesort')
+    resumen = []
+
+    # 1. Duplicados de fecha_hora
+    if colapsar_duplicados:
+        total_inicial = len(df)
+        df = df.drop_duplicates(subset=['id_instrumento', 'date_time'], keep='last')
+        resumen.append(f"{total_inicial - len(df)} duplicados")
+
+    df = df.copy()
+
+    # 2. Segmentos por huecos
+    if segmentar:
+        ids = df['id_instrumento']
+        salto = df.groupby(ids, sort=False)['date_time'].diff()
+        # Instrumentos de lectura manual (ej. mensual) no se cortan en cada lectura
+        limite_hueco = (salto.groupby(ids, sort=False).transform('median') * 3).clip(
+            lower=pd.Timedelta(days=max_hueco_dias))
+        nuevo_segmento = salto > limite_hueco
+        df['segmento'] = nuevo_segmento.groupby(ids, sort=False).cumsum().astype(int)
+        resumen.append(f"{int(nuevo_segmento.sum())} huecos")
+
+    # 3. Picos aislados respecto a la mediana móvil
+    if eliminar_picos:
+        ids = df['id_instrumento']
+        valores = df['elevacion_piezometrica']
+        mediana = (valores.groupby(ids, sort=False)
+                          .rolling(ventana, center=True, min_periods=1).median()
+                          .reset_index(level=0, drop=True))
+        desviacion = (valores - mediana).abs()
+        # En series suaves la desviación local es casi siempre 0, por eso la escala (MAD)
+        # se calcula sobre toda la serie del instrumento y no sobre la ventana
+        mad = desviacion.groupby(ids, sort=False).transform('median')
+        atipico = desviacion > np.maximum(umbral_mad * 1.4826 * mad, desviacion_min)
+        # Los extremos de la serie cuentan como vecinos atípicos: allí la mediana móvil
+        # está sesgada por la tendencia y no hay con qué confirmar el pico
+        vecino_atipico = (atipico.groupby(ids, sort=False).shift(1, fill_value=True)
+                          | atipico.groupby(ids, sort=False).shift(-1, fill_value=True))
+        es_pico = atipico & ~vecino_atipico
+        df = df[~es_pico].copy()
+        resumen.append(f"{int(es_pico.sum())} picos eliminados")
+
+    # 4. Valores pegados (por duración, sin eliminarlos)
+    if marcar_pegados:
+        ids = df['id_instrumento']
+        valores = df['elevacion_piezometrica']
+        tramo = ((valores != valores.shift()) | (ids != ids.shift())).cumsum()
+        inicio_tramo = df['date_time'].groupby(tramo).transform('first')
+        df['pegado'] = (df['date_time'] - inicio_tramo) >= pd.Timedelta(days=dias_pegado)
+        resumen.append(f"{int(df['pegado'].sum())} valores pegados marcados")
+
+    if resumen:
+        print(f"✓ Control de calidad: {', '.join(resumen)}")
+
+    return df
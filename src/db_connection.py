@@ -35,3 +35,18 @@ def execute_query(conexion, query, params=None):
 def close_connection(conexion):
     if conexion:
         conexion.close()
+
+
+def execute_command(conexion, query, params=None):
+    try:
+        cursor = conexion.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        filas = cursor.rowcount  # Filas afectadas (-1 si no aplica, ej. CREATE TABLE)
+        cursor.close()
+        return filas
+    except psycopg2.Error as e:
+        print(f"Error en la ejecución de la consulta: {e}")
+        return None
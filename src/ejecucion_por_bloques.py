@@ -0,0 +1,221 @@
+import gc
+import os
+import shutil
+
+import pandas as pd
+
+from .carga_diferida import importar_matplotlib
+from .control_calidad import control_calidad
+from .data_processing import process_data, process_precipitation_data
+from .db_connection import execute_query
+from .layout_eje_x import calcular_layout_plotter
+from .registro_instrumentos import obtener_instrumento, ordenar_por_hoja, plotter_instrumento
+from .resumen_diario import TABLA_RESUMEN, consultar_piezometros, refrescar_resumen_diario, usar_resumen
+from .utilidades_excel import guardar_graficos_en_lote
+
+
+def memoria_actual_mb():
+    """
+    Memoria residente del proceso en MB, o None si no se puede medir.
+
+    Usa /proc en Linux y psutil en otros sistemas (Windows, macOS).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def consultar_instrumentos(conexion, fecha_inicio, fecha_fin):
+    query = '''
+        SELECT DISTINCT id_instrumento
+        FROM {tabla}
+        WHERE "fecha" BETWEEN %s AND %s '''
+    # Igual que consultar_piezometros: si el resumen no está disponible se usan los datos crudos
+    if usar_resumen(fecha_inicio, fecha_fin):
+        result, columns = execute_query(conexion, query.format(tabla=TABLA_RESUMEN), (fecha_inicio, fecha_fin))
+        if columns is not None:
+            return [fila[0] for fila in result] if result else []
+    result, _ = execute_query(conexion, query.format(tabla='"MV_PIEZOMETROS".pz_abiertos'), (fecha_inicio, fecha_fin))
+    return [fila[0] for fila in result] if result else []
+
+
+def consultar_precipitacion(conexion, fecha_inicio, fecha_fin):
+    query = '''
+        SELECT fecha, hora, rain_mm_tot
+        FROM "MV_NAD_DR"."00_em_via12"
+        WHERE fecha BETWEEN %s AND %s
+        ORDER BY fecha, hora
+    '''
+    result_p, col_p = execute_query(conexion, query, (fecha_inicio, fecha_fin))
+    if not result_p:
+        print("⚠️ No hay datos de precipitación")
+        return pd.DataFrame()
+    return process_precipitation_data(result_p, col_p)
+
+
+def generar_reporte_por_bloques(conexion, fecha_inicio, fecha_fin, excel_path, instrumentos=None,
+                                tamano_bloque=10, limite_memoria_mb=None, plot_data=None,
+                                temp_dir="temp_graficos", bordes=None, por_tipo=False):
+    """
+    Genera el reporte procesando los instrumentos por bloques para acotar la memoria.
+
+    Por cada bloque se consultan solo sus datos (resumen diario si el rango es largo), se grafican, se guardan los PNG en disco
+    y se liberan el DataFrame y las figuras antes de pasar al siguiente. Con limite_memoria_mb,
+    se mide cuánto crece la memoria por instrumento durante cada bloque y el siguiente bloque
+    se dimensiona para caber en la memoria que queda libre (sin superar tamano_bloque). Si ni
+    un solo instrumento cabe, el proceso se detiene sin modificar el Excel (MemoryError).
+    Al final todos los gráficos se insertan en el Excel en una sola pasada.
+
+    Parámetros:
+        conexion          : Conexión a la base de datos PostgreSQL
+        fecha_inicio      : Fecha inicial ('YYYY-MM-DD')
+        fecha_fin         : Fecha final ('YYYY-MM-DD')
+        excel_path        : Ruta del archivo Excel
+        instrumentos      : Lista de instrumentos. None = los que tienen datos en el rango
+        tamano_bloque     : Número de instrumentos consultados y graficados a la vez
+        limite_memoria_mb : Memoria máxima (MB) del proceso. None = sin límite
+        plot_data         : Función de graficado (por defecto plotter_abiertos.plot_data)
+        temp_dir          : Carpeta temporal para los PNG
+        bordes            : Argumentos de formato para guardar_graficos_en_lote
+        por_tipo          : Sin plot_data, graficar los instrumentos 'cerrado' del registro con
+                            plotter_cerrados (cambia el aspecto de esos gráficos: sin spline,
+                            otra leyenda y otros márgenes)
+
+    Retorna:
+        tuple: (gráficos generados, instrumentos procesados)
+
+    Lanza:
+        MemoryError: Si con limite_memoria_mb no queda memoria ni para un instrumento más
+    """
+    if plot_data is None and not por_tipo:
+        from .plotter_abiertos import plot_data
+
+    plt = importar_matplotlib()[0]
+
+    # Rangos largos se consultan en el resumen diario: actualizarlo antes
+    if usar_resumen(fecha_inicio, fecha_fin):
+        refrescar_resumen_diario(conexion)
+
+    if instrumentos is None:
+        instrumentos = consultar_instrumentos(conexion, fecha_inicio, fecha_fin)
+    # Los instrumentos de una misma hoja quedan juntos (y en el mismo bloque si caben)
+    instrumentos = ordenar_por_hoja(instrumentos)
+
+    if not instrumentos:
+        print("✗ No hay instrumentos para graficar")
+        return 0, 0
+
+    if limite_memoria_mb and memoria_actual_mb() is None:
+        print(f"⚠️ No se puede medir la memoria del proceso (instale psutil). "
+              f"El límite de {limite_memoria_mb} MB no se aplicará")
+
+    # La precipitación es una sola estación: se consulta una vez y solo se conservan las columnas usadas
+    df_precip = consultar_precipitacion(conexion, fecha_inicio, fecha_fin)
+    if not df_precip.empty:
+        df_precip = df_precip[['date_time', 'rain_mm_tot']]
+
+    os.makedirs(temp_dir, exist_ok=True)
+
+    graficos_info = []
+    graficos_generados = 0
+    tamano_maximo = tamano_bloque = max(1, tamano_bloque)
+    costo_instrumento = 0.0  # Mayor crecimiento de memoria (MB) por instrumento observado
+    inicio = 0
+
+    while inicio < len(instrumentos):
+        bloque = instrumentos[inicio:inicio + tamano_bloque]
+        inicio += len(bloque)
+        print(f"\nBloque de {len(bloque)} instrumentos ({inicio}/{len(instrumentos)})...")
+        memoria_inicial = pico = memoria_actual_mb()
+
+        result, columns = consultar_piezometros(conexion, fecha_inicio, fecha_fin, instrumentos=bloque)
+        if not result:
+            print("  Sin datos para este bloque")
+            continue
+
+        df = control_calidad(process_data(result, columns))
+        del result
+
+        for sensor, df_instrumento in df.groupby('id_instrumento', sort=True):
+            datos_registro = obtener_instrumento(sensor)
+            sheet_name, cell = (datos_registro.hoja, datos_registro.celda) if datos_registro else ("Hoja1", "A1")
+
+            try:
+                plotter = plot_data or plotter_instrumento(sensor)
+                fig = plotter(
+                    df_instrumento,
+                    df_precip,
+                    tabla=sensor,
+                    conexion=conexion,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    excel_path=excel_path,
+                    sheet_name=sheet_name,
+                    cell=cell,
+                    # Eje X común del reporte (en caché por rango y tipo de plotter)
+                    layout_eje_x=calcular_layout_plotter(plotter, fecha_inicio, fecha_fin)
+                )
+
+                if fig:
+                    png_path = os.path.join(temp_dir, f"{sensor}.png")
+                    fig.savefig(png_path, format='png', bbox_inches='tight', dpi=100)
+                    plt.close(fig)  # Liberar memoria
+                    graficos_info.append((png_path, sheet_name, cell, sensor))
+                    graficos_generados += 1
+
+            except Exception as e:
+                print(f"  ✗ Error al generar gráfico para {sensor}: {e}")
+
+            if pico is not None:
+                pico = max(pico, memoria_actual_mb())
+
+        # Liberar el bloque antes de consultar el siguiente (incluye figuras que
+        # plot_data creó pero no retornó por falta de datos válidos)
+        plt.close('all')
+        df = df_instrumento = fig = None
+        gc.collect()
+
+        memoria = memoria_actual_mb()
+        if not limite_memoria_mb or memoria is None or inicio >= len(instrumentos):
+            continue
+
+        # La memoria liberada no siempre vuelve al sistema, así que el tamaño del siguiente
+        # bloque se calcula con la memoria libre que queda y el costo por instrumento
+        costo_instrumento = max(costo_instrumento, (pico - memoria_inicial) / len(bloque))
+        holgura = limite_memoria_mb - memoria
+        if holgura <= costo_instrumento:
+            # Un reporte parcial no se escribe: el Excel quedaría con gráficos de otro período
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise MemoryError(
+                f"Memoria {memoria:.0f} MB: un instrumento más (~{costo_instrumento:.0f} MB) superaría el "
+                f"límite de {limite_memoria_mb} MB. Se detuvo con {inicio}/{len(instrumentos)} instrumentos "
+                f"y el Excel no se modificó. Aumente limite_memoria_mb o reduzca el rango de fechas")
+
+        nuevo_tamano = tamano_maximo if costo_instrumento <= 0 else int(holgura // costo_instrumento)
+        nuevo_tamano = max(1, min(tamano_maximo, nuevo_tamano))
+        if nuevo_tamano != tamano_bloque:
+            print(f"  ⚠️ Memoria {memoria:.0f} MB de {limite_memoria_mb} MB. Bloques de {nuevo_tamano} instrumentos")
+            tamano_bloque = nuevo_tamano
+
+    if graficos_info:
+        guardar_graficos_en_lote(graficos_info, excel_path, bordes=bordes)
+
+    try:
+        shutil.rmtree(temp_dir)
+    except Exception as e:
+        print(f"⚠️ No se pudieron eliminar archivos temporales: {e}")
+
+    print("\n" + "="*50)
+    print(f"✓ Proceso completado: {graficos_generados}/{len(instrumentos)} gráficos generados")
+    print("="*50)
+
+    return graficos_generados, len(instrumentos)
@@ -1,3 +1,5 @@
-# Lista de piezómetros para que no se grafiquen los umbrales
-no_graficar_umbral = ["PC23_05_T_S1", "PA22_01_T", 'PC23_16_T_S1', 'PC23_16_T_S2', 'PC22_08_T_S2', 
-                               'PC22_08_T_S3', 'PC22_14_T_S1' ]
\ No newline at end of file
+from .registro_instrumentos import cargar_registro
+
+# Lista de piezómetros para que no se grafiquen los umbrales (columna graficar_umbral del registro)
+no_graficar_umbral = [instrumento.id_instrumento for instrumento in cargar_registro().values()
+                      if not instrumento.graficar_umbral]
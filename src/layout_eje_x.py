@@ -0,0 +1,98 @@
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+import pandas as pd
+
+from .carga_diferida import importar_matplotlib
+
+# Intervalo de ticks (días) según el rango: (rango mínimo exclusivo en días, intervalo).
+# Si el rango no supera ningún límite se usa un tick por día.
+INTERVALOS_ABIERTOS = ((365, 60), (180, 30), (90, 15), (31, 7))
+INTERVALOS_CERRADOS = ((365, 60), (180, 20), (90, 15), (31, 7))
+
+FORMATO_FECHA = '%d-%m-%Y'
+
+LayoutEjeX = namedtuple('LayoutEjeX', ['xlim', 'rango_dias', 'intervalo', 'ticks', 'etiquetas', 'ancho_barra'])
+
+
+def calcular_layout_eje_x(fecha_min, fecha_max, intervalos=INTERVALOS_ABIERTOS):
+    """
+    Calcula (una sola vez por rango) la configuración del eje X de los gráficos.
+
+    El resultado se guarda en caché, así que todos los gráficos de un mismo reporte
+    (o con el mismo rango de datos) reutilizan los mismos ticks y etiquetas ya formateadas.
+
+    Parámetros:
+        fecha_min  : Fecha inicial del eje (str, datetime o Timestamp)
+        fecha_max  : Fecha final del eje
+        intervalos : Tabla de intervalos (INTERVALOS_ABIERTOS o INTERVALOS_CERRADOS)
+
+    Retorna:
+        LayoutEjeX: xlim, rango_dias, intervalo, ticks, etiquetas y ancho_barra
+    """
+    return _calcular_layout_eje_x(pd.Timestamp(fecha_min), pd.Timestamp(fecha_max), tuple(intervalos))
+
+
+def calcular_layout_plotter(plot_data, fecha_min, fecha_max):
+    """
+    Igual que calcular_layout_eje_x, con la tabla de intervalos del plotter que va a
+    usar el layout (variable INTERVALOS de su módulo; INTERVALOS_ABIERTOS si no la define).
+
+    Parámetros:
+        plot_data : Función de graficado (ej. plotter_cerrados.plot_data)
+        fecha_min : Fecha inicial del eje
+        fecha_max : Fecha final del eje
+
+    Retorna:
+        LayoutEjeX
+    """
+    intervalos = getattr(sys.modules.get(plot_data.__module__), 'INTERVALOS', INTERVALOS_ABIERTOS)
+    return calcular_layout_eje_x(fecha_min, fecha_max, intervalos)
+
+
+@lru_cache(maxsize=256)
+def _calcular_layout_eje_x(fecha_min, fecha_max, intervalos):
+    mdates = importar_matplotlib()[1]
+
+    # Ancho de barras según el rango de fechas
+    if fecha_min == fecha_max:
+        ancho_barra = 0.008
+    elif (fecha_max - fecha_min).days <= 10:
+        ancho_barra = 0.015
+    else:
+        ancho_barra = max(0.035, (fecha_max - fecha_min).days / 100 * 0.2)
+
+    # Si solo hay un punto, centrar el eje en ese punto
+    if fecha_min == fecha_max:
+        fecha_min -= pd.Timedelta(days=1)
+        fecha_max += pd.Timedelta(days=1)
+
+    rango_dias = max(1, (fecha_max - fecha_min).days)
+    intervalo = next((dias for limite, dias in intervalos if rango_dias > limite), 1)
+
+    # Mismos ticks que colocaría DayLocator con estos límites, formateados una sola vez
+    vmin, vmax = mdates.date2num(fecha_min), mdates.date2num(fecha_max)
+    ticks = mdates.DayLocator(interval=intervalo).tick_values(mdates.num2date(vmin), mdates.num2date(vmax))
+    ticks = tuple(t for t in ticks if vmin <= t <= vmax)
+    etiquetas = tuple(mdates.num2date(t).strftime(FORMATO_FECHA) for t in ticks)
+
+    return LayoutEjeX(
+        xlim=(fecha_min, fecha_max),
+        rango_dias=rango_dias,
+        intervalo=intervalo,
+        ticks=ticks,
+        etiquetas=etiquetas,
+        ancho_barra=ancho_barra
+    )
+
+
+def aplicar_layout_eje_x(ax, layout):
+    """
+    Aplica un LayoutEjeX a un eje: límites, ticks fijos y etiquetas precalculadas.
+    """
+    ticker = importar_matplotlib()[2]
+
+    ax.set_xlim(layout.xlim)
+    ax.xaxis.set_major_locator(ticker.FixedLocator(layout.ticks))
+    ax.xaxis.set_major_formatter(ticker.FixedFormatter(layout.etiquetas))
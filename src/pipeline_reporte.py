@@ -0,0 +1,261 @@
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .carga_diferida import importar_matplotlib
+from .control_calidad import control_calidad
+from .data_processing import process_data
+from .ejecucion_por_bloques import consultar_instrumentos, consultar_precipitacion
+from .layout_eje_x import calcular_layout_plotter
+from .obtener_umbrales import obtener_umbrales
+from .registro_instrumentos import debe_graficar_umbral, obtener_instrumento, ordenar_por_hoja, plotter_instrumento
+from .resumen_diario import consultar_piezometros, refrescar_resumen_diario, usar_resumen
+from .utilidades_excel import guardar_graficos_en_lote
+
+# Marca de fin de la cola de datos
+_FIN = None
+
+# Contexto compartido por cada trabajador de render (se inicializa una vez por proceso/hilo)
+_contexto = {}
+
+def _inicializar_trabajador(plot_data, df_precip, fecha_inicio, fecha_fin, temp_dir):
+    _contexto.update(
+        plot_data=plot_data,
+        df_precip=df_precip,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        temp_dir=temp_dir
+    )
+
+
+def _renderizar(orden, sensor, df_instrumento, sheet_name, cell):
+    """
+    Genera el gráfico de un instrumento y lo guarda como PNG.
+
+    Retorna:
+        tuple: (orden, (png_path, sheet_name, cell, sensor)) o (orden, None) si no hay gráfico
+    """
+    plt = importar_matplotlib()[0]
+
+    try:
+        plotter = _contexto['plot_data'] or plotter_instrumento(sensor)
+        fig = plotter(
+            df_instrumento,
+            _contexto['df_precip'],
+            tabla=sensor,
+            conexion=None,  # Los umbrales ya vienen en el DataFrame
+            fecha_inicio=_contexto['fecha_inicio'],
+            fecha_fin=_contexto['fecha_fin'],
+            sheet_name=sheet_name,
+            cell=cell,
+            layout_eje_x=calcular_layout_plotter(plotter, _contexto['fecha_inicio'], _contexto['fecha_fin'])
+        )
+        if not fig:
+            return orden, None
+
+        png_path = os.path.join(_contexto['temp_dir'], f"{sensor}.png")
+        fig.savefig(png_path, format='png', bbox_inches='tight', dpi=100)
+        return orden, (png_path, sheet_name, cell, sensor)
+
+    finally:
+        plt.close('all')  # Liberar memoria
+
+
+def _producir_datos(conexion, fecha_inicio, fecha_fin, instrumentos, tamano_bloque, cola, errores, detener):
+    """
+    Etapa 1 (hilo): consulta por bloques, aplica control de calidad, agrega los umbrales
+    como columnas y entrega cada instrumento a la cola. cola.put bloquea si la cola está
+    llena, lo que frena la consulta cuando el render va más lento.
+    """
+    orden = {sensor: i for i, sensor in enumerate(instrumentos)}
+
+    try:
+        for inicio in range(0, len(instrumentos), tamano_bloque):
+            if detener.is_set():
+                break
+
+            bloque = instrumentos[inicio:inicio + tamano_bloque]
+            result, columns = consultar_piezometros(conexion, fecha_inicio, fecha_fin, instrumentos=bloque)
+            if not result:
+                continue
+
+            df = control_calidad(process_data(result, columns))
+            del result
+
+            for sensor, df_instrumento in df.groupby('id_instrumento', sort=True):
+                if detener.is_set():
+                    break
+
+                if debe_graficar_umbral(sensor):
+                    umbrales = obtener_umbrales(conexion, sensor) or {}
+                    df_instrumento = df_instrumento.assign(**umbrales)
+
+                cola.put((orden.get(sensor, len(orden)), sensor, df_instrumento))
+
+    except Exception as e:
+        errores.append(e)
+
+    finally:
+        cola.put(_FIN)
+
+
+def generar_reporte_en_pipeline(conexion, fecha_inicio, fecha_fin, excel_path, instrumentos=None,
+                                tamano_bloque=10, trabajadores_render=2, modo='proceso',
+                                max_en_cola=20, plot_data=None, temp_dir="temp_graficos", bordes=None,
+                                por_tipo=False):
+    """
+    Genera el reporte con las etapas solapadas en lugar de en fases consecutivas.
+
+    Etapas:
+        1. Consulta y partición (hilo): trae los datos por bloques de instrumentos y los
+           deja en una cola acotada (max_en_cola).
+        2. Render y PNG (trabajadores): cada instrumento se grafica y guarda como PNG.
+           Como máximo hay trabajadores_render * 2 gráficos en curso; si el render se
+           atrasa, la cola se llena y la consulta espera (contrapresión).
+        3. Inserción en Excel: los resultados se reordenan según la lista de instrumentos
+           y se insertan en una sola pasada con guardar_graficos_en_lote.
+
+    Parámetros:
+        conexion            : Conexión a la base de datos PostgreSQL
+        fecha_inicio        : Fecha inicial ('YYYY-MM-DD')
+        fecha_fin           : Fecha final ('YYYY-MM-DD')
+        excel_path          : Ruta del archivo Excel
+        instrumentos        : Lista de instrumentos. None = los que tienen datos en el rango
+        tamano_bloque       : Instrumentos por consulta en la etapa 1
+        trabajadores_render : Número de procesos de render. 0 = render en el hilo principal
+        modo                : 'proceso' (render en paralelo real) o 'hilo' (un solo hilo de render,
+                              solapado con la consulta; útil si no se pueden crear procesos).
+                              pyplot mantiene estado global, así que en modo 'hilo' se usa un
+                              único trabajador aunque trabajadores_render sea mayor
+        max_en_cola         : Tamaño máximo de la cola entre consulta y render
+        plot_data           : Función de graficado (por defecto plotter_abiertos.plot_data)
+        temp_dir            : Carpeta temporal para los PNG
+        bordes              : Argumentos de formato para guardar_graficos_en_lote
+        por_tipo            : Sin plot_data, graficar los instrumentos 'cerrado' del registro con
+                              plotter_cerrados (cambia el aspecto de esos gráficos: sin spline,
+                              otra leyenda y otros márgenes)
+
+    Retorna:
+        tuple: (gráficos generados, instrumentos procesados)
+    """
+    if plot_data is None and not por_tipo:
+        from .plotter_abiertos import plot_data
+
+    if usar_resumen(fecha_inicio, fecha_fin):
+        refrescar_resumen_diario(conexion)
+
+    if instrumentos is None:
+        instrumentos = consultar_instrumentos(conexion, fecha_inicio, fecha_fin)
+    instrumentos = ordenar_por_hoja(instrumentos)
+
+    if not instrumentos:
+        print("✗ No hay instrumentos para graficar")
+        return 0, 0
+
+    df_precip = consultar_precipitacion(conexion, fecha_inicio, fecha_fin)
+    if not df_precip.empty:
+        df_precip = df_precip[['date_time', 'rain_mm_tot']]
+
+    os.makedirs(temp_dir, exist_ok=True)
+    contexto = (plot_data, df_precip, fecha_inicio, fecha_fin, temp_dir)
+
+    # Etapa 1: consulta en segundo plano
+    cola = queue.Queue(maxsize=max(1, max_en_cola))
+    errores = []
+    detener = threading.Event()
+    productor = threading.Thread(
+        target=_producir_datos,
+        args=(conexion, fecha_inicio, fecha_fin, instrumentos, max(1, tamano_bloque), cola, errores, detener),
+        daemon=True
+    )
+    productor.start()
+
+    # Etapa 2: render
+    if trabajadores_render <= 0:
+        _inicializar_trabajador(*contexto)
+        ejecutor = None
+    elif modo == 'hilo':
+        _inicializar_trabajador(*contexto)
+        trabajadores_render = 1
+        ejecutor = ThreadPoolExecutor(max_workers=1)
+    else:
+        ejecutor = ProcessPoolExecutor(
+            max_workers=trabajadores_render,
+            initializer=_inicializar_trabajador,
+            initargs=contexto
+        )
+
+    resultados = {}
+    max_en_vuelo = max(1, trabajadores_render * 2)
+
+    def recolectar(futuros):
+        for futuro in futuros:
+            try:
+                orden, info = futuro.result()
+                if info:
+                    resultados[orden] = info
+            except Exception as e:
+                print(f"  ✗ Error al generar gráfico: {e}")
+
+    try:
+        pendientes = set()
+        while True:
+            tarea = cola.get()
+            if tarea is _FIN:
+                break
+
+            orden, sensor, df_instrumento = tarea
+            print(f"Procesando {sensor}...")
+            datos_registro = obtener_instrumento(sensor)
+            sheet_name, cell = (datos_registro.hoja, datos_registro.celda) if datos_registro else ("Hoja1", "A1")
+
+            if ejecutor is None:
+                try:
+                    orden, info = _renderizar(orden, sensor, df_instrumento, sheet_name, cell)
+                    if info:
+                        resultados[orden] = info
+                except Exception as e:
+                    print(f"  ✗ Error al generar gráfico para {sensor}: {e}")
+                continue
+
+            # Contrapresión: no enviar más trabajo si ya hay max_en_vuelo gráficos en curso
+            if len(pendientes) >= max_en_vuelo:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                recolectar(hechos)
+
+            pendientes.add(ejecutor.submit(_renderizar, orden, sensor, df_instrumento, sheet_name, cell))
+
+        recolectar(wait(pendientes)[0])
+
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=True)
+
+        # Si el render terminó por un error, liberar al productor que pueda estar esperando en la cola
+        detener.set()
+        while productor.is_alive():
+            try:
+                cola.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    for e in errores:
+        print(f"✗ Error en la consulta de datos: {e}")
+
+    # Etapa 3: ensamblado ordenado e inserción en Excel
+    graficos_info = [resultados[orden] for orden in sorted(resultados)]
+    if graficos_info:
+        guardar_graficos_en_lote(graficos_info, excel_path, bordes=bordes)
+
+    try:
+        shutil.rmtree(temp_dir)
+    except Exception as e:
+        print(f"⚠️ No se pudieron eliminar archivos temporales: {e}")
+
+    print("\n" + "="*50)
+    print(f"✓ Proceso completado: {len(graficos_info)}/{len(instrumentos)} gráficos generados")
+    print("="*50)
+
+    return len(graficos_info), len(instrumentos)
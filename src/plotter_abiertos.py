@@ -1,17 +1,19 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.lines import Line2D
-import matplotlib.ticker as ticker
-from scipy.interpolate import make_interp_spline, UnivariateSpline
-
 import numpy as np
 import pandas as pd
 
-from .excluir_umbral import no_graficar_umbral
+from .carga_diferida import importar_matplotlib
+from .layout_eje_x import INTERVALOS_ABIERTOS, aplicar_layout_eje_x, calcular_layout_eje_x
+from .registro_instrumentos import debe_graficar_umbral
 from .obtener_umbrales import obtener_umbrales
 
-def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, excel_path=None, sheet_name=None, cell=None):
+# Intervalos de ticks del eje X de este plotter (ver layout_eje_x.calcular_layout_plotter)
+INTERVALOS = INTERVALOS_ABIERTOS
+
+def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, excel_path=None, sheet_name=None, cell=None, layout_eje_x=None):
     
+    # matplotlib y scipy se cargan al graficar, no al importar el módulo
+    plt, mdates, ticker, Line2D = importar_matplotlib()
+
     # Crear una figura y un eje
     fig, ax1 = plt.subplots(figsize=(14, 7))
     plt.style.use('bmh')  # Estilo de Seaborn
@@ -22,7 +24,8 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     df = df[(df['date_time'] >= fecha_inicio_dt) & (df['date_time'] <= fecha_fin_dt)]
     
     # Filtrar datos válidos
-    datos_validos = df[['date_time', 'elevacion_piezometrica']].dropna().drop_duplicates(subset='date_time', keep='last')
+    columnas = ['date_time', 'elevacion_piezometrica'] + [col for col in ('segmento', 'pegado') if col in df.columns]
+    datos_validos = df[columnas].dropna().drop_duplicates(subset='date_time', keep='last')
     if datos_validos.empty:
         print(f"⚠️ No hay datos válidos para graficar en {tabla}")
         return None
@@ -30,7 +33,7 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # --------------------------------------------------------------------
     # CONFIGURACIÓN DE UMBRALES
     # --------------------------------------------------------------------
-    graficar_umbrales = tabla not in no_graficar_umbral
+    graficar_umbrales = debe_graficar_umbral(tabla)
     umbrales_disponibles = None  
 
     if graficar_umbrales and conexion:  
@@ -79,47 +82,77 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     ax1.yaxis.set_major_formatter(ticker.FormatStrFormatter('%.1f'))
 
     ## Graficar los datos con línea suavizada ##
-    x = mdates.date2num(datos_validos['date_time']) # Convertir fechas a números
-    y = datos_validos['elevacion_piezometrica'].values 
-
-    # # Suavizar la línea si hay más de 3 puntos
-    if len(x) > 3: 
-        x_suave = np.linspace(x.min(), x.max(), 200) 
-        spl = make_interp_spline(x, y, k=3) # Spline cúbica
-        y_suave = spl(x_suave) 
-  
-        # Graficar línea suavizada
-        serie1, = ax1.plot(mdates.num2date(x_suave), y_suave, 
-                color="#00008B", 
-                linewidth=2, 
-                label="Nivel Freático",
-                zorder=2)
-
-        # Graficar puntos originales
-        ax1.plot(datos_validos['date_time'], 
-                y, 'o',   
-                markersize=5.2,
-                color='#00008B', 
-                label='Datos originales',
-                zorder=4  # Puntos sobre la línea
-                )
+    # Cada segmento (separado por huecos en los datos) se grafica por separado para no interpolar a través del hueco
+    if 'segmento' in datos_validos.columns:
+        segmentos = [datos_segmento for _, datos_segmento in datos_validos.groupby('segmento', sort=True)]
     else:
-        # Si hay pocos puntos, graficar normal
-        serie1, = ax1.plot(
-            datos_validos['date_time'],
-            y,
-            color="#00008B",
-            label='Nivel Freático',
-            linewidth=2,
-            marker='o',
-            markersize=5.2,
-            zorder=3
+        segmentos = [datos_validos]
+
+    serie1 = None
+    for datos_segmento in segmentos:
+        x = mdates.date2num(datos_segmento['date_time']) # Convertir fechas a números
+        y = datos_segmento['elevacion_piezometrica'].values 
+
+        # # Suavizar la línea si hay más de 3 puntos
+        if len(x) > 3: 
+            from scipy.interpolate import make_interp_spline
+
+            x_suave = np.linspace(x.min(), x.max(), 200) 
+            spl = make_interp_spline(x, y, k=3) # Spline cúbica
+            y_suave = spl(x_suave) 
+      
+            # Graficar línea suavizada
+            linea, = ax1.plot(mdates.num2date(x_suave), y_suave, 
+                    color="#00008B", 
+                    linewidth=2, 
+                    label="Nivel Freático",
+                    zorder=2)
+
+            # Graficar puntos originales
+            ax1.plot(datos_segmento['date_time'], 
+                    y, 'o',   
+                    markersize=5.2,
+                    color='#00008B', 
+                    label='Datos originales',
+                    zorder=4  # Puntos sobre la línea
+                    )
+        else:
+            # Si hay pocos puntos, graficar normal
+            linea, = ax1.plot(
+                datos_segmento['date_time'],
+                y,
+                color="#00008B",
+                label='Nivel Freático',
+                linewidth=2,
+                marker='o',
+                markersize=5.2,
+                zorder=3
+            )
+
+        if serie1 is None:
+            serie1 = linea
+
+    # Lecturas marcadas como pegadas por control_calidad (mismo valor durante días):
+    # se conservan en la serie y se resaltan para revisarlas
+    marca_pegado = None
+    if 'pegado' in datos_validos.columns and datos_validos['pegado'].any():
+        pegados = datos_validos[datos_validos['pegado']]
+        marca_pegado, = ax1.plot(
+            pegados['date_time'],
+            pegados['elevacion_piezometrica'],
+            'o',
+            markersize=10,
+            markerfacecolor='none',
+            markeredgecolor='dimgray',
+            markeredgewidth=1.5,
+            label='Valor repetido (posible sensor pegado)',
+            zorder=5
         )
         
 
-    # Calcular minimo y máximo valor de fechas
-    fecha_min = df['date_time'].min()
-    fecha_max = df['date_time'].max()
+    # Layout del eje X: el del reporte si se recibe; si no, el del rango de datos (en caché por rango)
+    if layout_eje_x is None:
+        layout_eje_x = calcular_layout_eje_x(df['date_time'].min(), df['date_time'].max(), INTERVALOS)
 
    
     #---------------------------------------------------------------------------------#
@@ -156,10 +189,8 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
             # Agrupar y calcular el máximo diario
             df_precip_diario = df_precip_indexed.resample('D').max().reset_index()
             
-            # Calcular rango de días del dataset de piezómetros
-            rango_dias = (df['date_time'].max() - df['date_time'].min()).days
-            if rango_dias == 0:
-                rango_dias = 1  # Evitar división por cero   
+            # Rango de días del eje X (mínimo 1)
+            rango_dias = layout_eje_x.rango_dias
             
             # Número de datos de precipitación
             num_datos = len(df_precip)
@@ -174,17 +205,8 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
             else:
                 df_precip_procesado = df_precip
 
-    # Calcular ancho de barras según rango
-    fecha_min = df['date_time'].min()
-    fecha_max = df['date_time'].max()
-    
-    if fecha_min == fecha_max:
-        ancho_barra = 0.008
-    elif (fecha_max - fecha_min).days <= 10:
-        ancho_barra = 0.015
-    else:
-        rango_dias = (fecha_max - fecha_min).days
-        ancho_barra = max(0.035, rango_dias / 100 * 0.2)
+    # Ancho de barras según rango (precalculado en el layout)
+    ancho_barra = layout_eje_x.ancho_barra
 
 
     # Dibujar las barras de precipitación
@@ -212,47 +234,9 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # CONFIGURACIÓN DEL EJE X
     # =============================================================================================
 
-    # Si solo hay un punto, ajusta los límites del eje X para que se centren en ese punto
-    if fecha_min == fecha_max:
-        fecha_min -= pd.Timedelta(days=1)  # Un día antes
-        fecha_max += pd.Timedelta(days=1)  # Un día después
-    
-    # Definir los límites de fechas en el eje X
-    ax1.set_xlim([fecha_min, fecha_max])
-
-    # Calcular el rango de días
-    rango_dias = (fecha_max - fecha_min).days
-    if rango_dias == 0: # Evitar división por cero
-        rango_dias = 1  # Asignar un valor mínimo para evitar errores
-
-    # Ajuste dinámico del intervalo en el eje X
-    if rango_dias > 365:
-        intervalo = 60  # Cada 2 meses aprox.
-    elif rango_dias > 180:
-        intervalo = 30  # Cada 1 mes
-    elif rango_dias > 90:
-        intervalo = 15  # Cada 15 días
-    elif rango_dias > 31:
-        intervalo = 7  # Cada semana
-    elif rango_dias <= 31:
-        intervalo = 1  # Cada día
-    else:
-        intervalo = max(1, rango_dias// 10)  # Dividir en 10 intervalos como máximo
-
-    ax1.xaxis.set_major_locator(mdates.DayLocator(interval=intervalo))  # Intervalo de días
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m-%Y'))
+    # Límites, ticks y etiquetas precalculados (sin aritmética de fechas por gráfico)
+    aplicar_layout_eje_x(ax1, layout_eje_x)
     ax1.tick_params(axis='x', labelsize=10, rotation=90)
-
-    # Validar las etiquetas del eje X
-    ticks = ax1.get_xticks()
-    new_labels = [mdates.num2date(num).strftime('%d-%m-%Y') for num in ticks]
-    if len(new_labels) > 0:
-        new_labels[-1] = fecha_max.strftime('%d-%m-%Y')  # Cambiar la última etiqueta a la última fecha
-    
-    # Asegurar que la última fecha esté en las etiquetas del eje X
-    # fechas_ticks = list(ax1.get_xticks())  # Obtener los ticks actuales
-    # fechas_ticks.append(mdates.date2num(fecha_max))  # Agregar la última fecha como tick
-    # ax1.set_xticks(fechas_ticks)  # Actualizar los ticks del eje Xz
    
 
     # ===============================================================================
@@ -295,6 +279,10 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     lines = [serie1]
     labels = [serie1.get_label()]
 
+    if marca_pegado is not None:
+        lines.append(marca_pegado)
+        labels.append(marca_pegado.get_label())
+
     if not df_precip_procesado.empty:
         lines.append(Line2D([], [], color='#009ACD', linewidth=4, linestyle='-'))
         labels.append('Precipitación')
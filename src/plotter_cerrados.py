@@ -1,14 +1,19 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.lines import Line2D
-import matplotlib.ticker as ticker
+import numpy as np
 import pandas as pd
 
 
-from .excluir_umbral import no_graficar_umbral
+from .carga_diferida import importar_matplotlib
+from .layout_eje_x import INTERVALOS_CERRADOS, aplicar_layout_eje_x, calcular_layout_eje_x
+from .registro_instrumentos import debe_graficar_umbral
 from .obtener_umbrales import obtener_umbrales
 
-def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, excel_path=None, sheet_name=None, cell=None):
+# Intervalos de ticks del eje X de este plotter (ver layout_eje_x.calcular_layout_plotter)
+INTERVALOS = INTERVALOS_CERRADOS
+
+def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, excel_path=None, sheet_name=None, cell=None, layout_eje_x=None):
+
+    # matplotlib se carga al graficar, no al importar el módulo
+    plt, mdates, ticker, Line2D = importar_matplotlib()
 
     fig, ax1 = plt.subplots(figsize=(14, 7))
     plt.style.use('bmh')
@@ -36,7 +41,7 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # -----------------------------------
     # Configuración de umbrales
     # -----------------------------------
-    graficar_umbrales = tabla not in no_graficar_umbral
+    graficar_umbrales = debe_graficar_umbral(tabla)
     umbrales_disponibles = None  
 
     if graficar_umbrales and conexion:
@@ -52,6 +57,7 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
             umbrales_disponibles = None
     elif graficar_umbrales and not conexion:
         # Fallback: buscar umbrales en el DataFrame si no hay conexión
+        umbrales_disponibles = {}
         for col in ['nivel_umbral_1', 'nivel_umbral_2', 'nivel_umbral_3']:
             if col in df.columns:
                 valor_umbral = df[col].dropna().iloc[0] if not df[col].dropna().empty else None
@@ -82,6 +88,12 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # -----------------------------------
     ax1.yaxis.set_major_formatter(ticker.FormatStrFormatter('%.1f'))
     dfv = df.dropna(subset=['elevacion_piezometrica'])
+    if 'segmento' in dfv.columns:
+        # Insertar un NaN al inicio de cada segmento para cortar la línea en los huecos de datos
+        cortes = dfv[dfv['segmento'].diff() > 0].copy()
+        cortes['elevacion_piezometrica'] = np.nan
+        cortes['date_time'] = cortes['date_time'] - pd.Timedelta(seconds=1)
+        dfv = pd.concat([dfv, cortes]).sort_values('date_time')
     serie1, = ax1.plot(
         dfv['date_time'],
         dfv['elevacion_piezometrica'],
@@ -93,6 +105,23 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
         zorder=3
     )
 
+    # Lecturas marcadas como pegadas por control_calidad (mismo valor durante días):
+    # se conservan en la serie y se resaltan para revisarlas
+    marca_pegado = None
+    if 'pegado' in dfv.columns and dfv['pegado'].any():
+        pegados = dfv[dfv['pegado']]
+        marca_pegado, = ax1.plot(
+            pegados['date_time'],
+            pegados['elevacion_piezometrica'],
+            'o',
+            markersize=10,
+            markerfacecolor='none',
+            markeredgecolor='dimgray',
+            markeredgewidth=1.5,
+            label='Valor repetido (posible sensor pegado)',
+            zorder=5
+        )
+
     # Aplicar solo cuando NO hay umbrales disponibles (diccionario vacío o None)
     if not datos_validos.empty and (umbrales_disponibles is None or not umbrales_disponibles):
         y_min = datos_validos['elevacion_piezometrica'].min()
@@ -106,6 +135,10 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # Eje secundario (Precipitación)
     # -----------------------------------
 
+    # Layout del eje X: el del reporte si se recibe; si no, el del rango de datos (en caché por rango)
+    if layout_eje_x is None:
+        layout_eje_x = calcular_layout_eje_x(df['date_time'].min(), df['date_time'].max(), INTERVALOS)
+
     df_precip_procesado = pd.DataFrame()
 
     if df_precip is not None and not df_precip.empty:
@@ -119,7 +152,7 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
             df_precip = df_precip.dropna(subset=['date_time'])
 
             # Resamplear a diario si hay muchos datos
-            rango_dias = max(1, (df['date_time'].max() - df['date_time'].min()).days)
+            rango_dias = layout_eje_x.rango_dias
             num_datos = len(df_precip)
             
             if num_datos / rango_dias > 50:
@@ -127,17 +160,8 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
             else:
                 df_precip_procesado = df_precip
 
-    # Calcular ancho de barras según rango
-    fecha_min = df['date_time'].min()
-    fecha_max = df['date_time'].max()
-
-    if fecha_min == fecha_max:
-        ancho_barra = 0.008
-    elif (fecha_max - fecha_min).days <= 10:
-        ancho_barra = 0.015
-    else:
-        rango_dias = (fecha_max - fecha_min).days
-        ancho_barra = max(0.035, rango_dias / 100 * 0.2)
+    # Ancho de barras según rango (precalculado en el layout)
+    ancho_barra = layout_eje_x.ancho_barra
 
     # Graficar barras de precipitación si hay datos
     if not df_precip_procesado.empty and 'rain_mm_tot' in df_precip_procesado.columns:
@@ -160,22 +184,7 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     # Configuración del eje X
     # -----------------------------------
 
-    if fecha_min == fecha_max:
-        fecha_min -= pd.Timedelta(days=1)
-        fecha_max += pd.Timedelta(days=1)
-
-    ax1.set_xlim([fecha_min, fecha_max])
-
-    rango_dias = max(1, (fecha_max - fecha_min).days)
-
-    if rango_dias > 365: intervalo = 60
-    elif rango_dias > 180: intervalo = 20
-    elif rango_dias > 90: intervalo = 15
-    elif rango_dias > 31: intervalo = 7
-    else: intervalo = 1
-
-    ax1.xaxis.set_major_locator(mdates.DayLocator(interval=intervalo))
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%d-%m-%Y'))
+    aplicar_layout_eje_x(ax1, layout_eje_x)
     ax1.tick_params(axis='x', rotation=90, labelsize=10)
 
     # -----------------------------------
@@ -212,6 +221,10 @@ def plot_data(df, df_precip, tabla, fecha_inicio, fecha_fin, conexion=None, exce
     lines = [serie1]
     labels = [serie1.get_label()]
 
+    if marca_pegado is not None:
+        lines.append(marca_pegado)
+        labels.append(marca_pegado.get_label())
+
     if not df_precip_procesado.empty:
         lines.append(Line2D([], [], color='#009ACD', linewidth=4, alpha=0.4))
         labels.append('Precipitación')
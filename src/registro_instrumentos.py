@@ -0,0 +1,158 @@
+import csv
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# Archivo con una fila por instrumento: id_instrumento, hoja, celda, tipo (abierto/cerrado),
+# graficar_umbral (1/0) y operativo (1/0)
+RUTA_REGISTRO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instrumentos.csv')
+
+Instrumento = namedtuple('Instrumento', ['id_instrumento', 'hoja', 'celda', 'tipo', 'graficar_umbral', 'operativo'])
+
+
+def normalizar_id(nombre):
+    """
+    Normaliza el nombre de un instrumento (mayúsculas y guiones en lugar de guiones bajos).
+    """
+    return str(nombre).strip().upper().replace('_', '-')
+
+
+@lru_cache(maxsize=None)
+def cargar_registro(ruta=RUTA_REGISTRO):
+    """
+    Carga el registro de instrumentos una sola vez por ruta.
+
+    Parámetros:
+        ruta : Ruta del archivo CSV del registro
+
+    Retorna:
+        dict: {id normalizado: Instrumento}, en el orden del archivo
+    """
+    registro = {}
+
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        for fila in csv.DictReader(archivo):
+            clave = normalizar_id(fila['id_instrumento'])
+            if clave in registro:
+                print(f"⚠️ Instrumento duplicado en el registro: {fila['id_instrumento']}")
+
+            registro[clave] = Instrumento(
+                id_instrumento=fila['id_instrumento'].strip(),
+                hoja=fila['hoja'].strip(),
+                celda=fila['celda'].strip(),
+                tipo=fila['tipo'].strip(),
+                graficar_umbral=fila['graficar_umbral'].strip() == '1',
+                operativo=fila['operativo'].strip() == '1'
+            )
+
+    return registro
+
+
+def obtener_instrumento(nombre, registro=None):
+    """
+    Busca un instrumento por nombre (acepta guiones o guiones bajos).
+
+    Retorna:
+        Instrumento o None si no está registrado
+    """
+    if registro is None:
+        registro = cargar_registro()
+    return registro.get(normalizar_id(nombre))
+
+
+def debe_graficar_umbral(nombre, registro=None):
+    """
+    Indica si se deben graficar los umbrales del instrumento (True si no está registrado).
+    """
+    instrumento = obtener_instrumento(nombre, registro)
+    return instrumento is None or instrumento.graficar_umbral
+
+
+def es_operativo(nombre, registro=None):
+    """
+    Indica si el instrumento está operativo (True si no está registrado).
+    """
+    instrumento = obtener_instrumento(nombre, registro)
+    return instrumento is None or instrumento.operativo
+
+
+def hojas_registro(registro=None):
+    """
+    Retorna la lista ordenada de hojas del reporte que tienen al menos un instrumento.
+    """
+    if registro is None:
+        registro = cargar_registro()
+    return sorted({instrumento.hoja for instrumento in registro.values()})
+
+
+def instrumentos_por_hoja(nombres=None, tipo=None, solo_operativos=True, registro=None):
+    """
+    Agrupa instrumentos registrados por hoja de destino.
+
+    Parámetros:
+        nombres         : Nombres a considerar (ej. instrumentos con datos). None = todo el registro
+        tipo            : 'abierto', 'cerrado' o None para ambos
+        solo_operativos : Excluir instrumentos inoperativos
+        registro        : Registro a usar (por defecto el archivo instrumentos.csv)
+
+    Retorna:
+        dict: {hoja: [Instrumento, ...]} con las hojas en orden alfabético
+    """
+    if registro is None:
+        registro = cargar_registro()
+
+    if nombres is None:
+        candidatos = registro.values()
+    else:
+        candidatos = [registro[clave] for clave in map(normalizar_id, nombres) if clave in registro]
+
+    grupos = {}
+    for instrumento in candidatos:
+        if solo_operativos and not instrumento.operativo:
+            continue
+        if tipo is not None and instrumento.tipo != tipo:
+            continue
+        grupos.setdefault(instrumento.hoja, []).append(instrumento)
+
+    return dict(sorted(grupos.items()))
+
+
+def ordenar_por_hoja(nombres, solo_operativos=True, registro=None):
+    """
+    Ordena instrumentos por hoja de destino para que los de una misma hoja (ej. sensores
+    S1/S2/S3 de un pozo) se procesen juntos. Los no registrados van al final, en orden alfabético.
+
+    Parámetros:
+        nombres         : Nombres de instrumentos tal como vienen en los datos
+        solo_operativos : Excluir instrumentos inoperativos
+        registro        : Registro a usar (por defecto el archivo instrumentos.csv)
+
+    Retorna:
+        list: Los nombres originales, agrupados por hoja
+    """
+    if registro is None:
+        registro = cargar_registro()
+
+    originales = {normalizar_id(nombre): nombre for nombre in nombres}
+    grupos = instrumentos_por_hoja(sorted(originales.values()), solo_operativos=solo_operativos, registro=registro)
+
+    ordenados = [originales[normalizar_id(instrumento.id_instrumento)]
+                 for instrumentos in grupos.values() for instrumento in instrumentos]
+    no_registrados = sorted(nombre for clave, nombre in originales.items() if clave not in registro)
+    return ordenados + no_registrados
+
+
+def plotter_instrumento(nombre, registro=None):
+    """
+    Función de graficado según el tipo del instrumento: plotter_cerrados para 'cerrado'
+    y plotter_abiertos en otro caso (incluye los no registrados).
+
+    Los reportes usan plotter_abiertos para todos los instrumentos; esta selección solo
+    se aplica con por_tipo=True en generar_reporte_por_bloques / generar_reporte_en_pipeline.
+    """
+    instrumento = obtener_instrumento(nombre, registro)
+    if instrumento is not None and instrumento.tipo == 'cerrado':
+        from .plotter_cerrados import plot_data
+    else:
+        from .plotter_abiertos import plot_data
+    return plot_data
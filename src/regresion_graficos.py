@@ -0,0 +1,247 @@
+"""
+Regresión visual y rendimiento de los gráficos.
+
+Genera un conjunto fijo de instrumentos sintéticos con ambos plotters, compara cada
+imagen con su PNG de referencia usando una tolerancia perceptual y registra, en la
+misma corrida, el tiempo de render y el tamaño del PNG de cada caso.
+
+Las referencias (referencia_graficos/*.png) se guardan en el repositorio. El texto se
+dibuja siempre con DejaVu Sans, la fuente incluida en matplotlib, para que no dependan
+de las fuentes instaladas en cada equipo.
+
+Uso:
+    python -m src.regresion_graficos --actualizar   # Generar/actualizar las referencias
+    python -m src.regresion_graficos                # Comparar contra las referencias
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .carga_diferida import importar_matplotlib
+from .control_calidad import control_calidad
+from .layout_eje_x import calcular_layout_plotter
+
+DIRECTORIO_REFERENCIA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'referencia_graficos')
+
+# Tolerancias por defecto: RMS de luminancia (0-1) tras suavizar y fracción de píxeles distintos
+TOLERANCIA_RMS = 0.005
+TOLERANCIA_PIXELES = 0.002
+
+# Estados que hacen fallar la regresión (salida 1)
+ESTADOS_FALLO = ('DIFERENTE', 'SIN REFERENCIA', 'SIN GRÁFICO')
+
+
+def _serie(inicio, fin, frecuencia, semilla, base=100.0, amplitud=1.0):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range(inicio, fin, freq=frecuencia)
+    t = np.arange(len(fechas))
+    valores = base + amplitud * np.sin(t / max(1, len(t) / 6)) + rng.normal(0, 0.05, len(t))
+    return pd.DataFrame({'date_time': fechas, 'elevacion_piezometrica': valores})
+
+
+def _precipitacion(inicio, fin, semilla):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range(inicio, fin, freq='6h')
+    lluvia = np.where(rng.random(len(fechas)) < 0.2, rng.gamma(2.0, 3.0, len(fechas)), 0.0)
+    return pd.DataFrame({'date_time': fechas, 'rain_mm_tot': lluvia})
+
+
+def corpus_sintetico():
+    """
+    Casos fijos (deterministas) que cubren los caminos principales de los plotters.
+
+    Retorna:
+        list: dicts con nombre, df, df_precip, fecha_inicio y fecha_fin
+    """
+    casos = []
+
+    # Mes típico con lectura diaria y precipitación
+    casos.append(dict(nombre='mes_diario', df=_serie('2025-11-01', '2025-11-30', '1D', 1),
+                      df_precip=_precipitacion('2025-11-01', '2025-11-30', 11),
+                      fecha_inicio='2025-11-01', fecha_fin='2025-11-30'))
+
+    # Lecturas cada hora (muchos puntos por spline) con umbrales en el DataFrame
+    df = _serie('2025-11-01', '2025-11-30', '1h', 2).assign(
+        nivel_umbral_1=101.0, nivel_umbral_2=101.5, nivel_umbral_3=102.0)
+    casos.append(dict(nombre='mes_horario_umbrales', df=df,
+                      df_precip=_precipitacion('2025-11-01', '2025-11-30', 12),
+                      fecha_inicio='2025-11-01', fecha_fin='2025-11-30'))
+
+    # Rango largo (2 años) semanal
+    casos.append(dict(nombre='dos_anios_semanal', df=_serie('2023-12-01', '2025-11-30', '7D', 3, amplitud=3.0),
+                      df_precip=_precipitacion('2023-12-01', '2025-11-30', 13),
+                      fecha_inicio='2023-12-01', fecha_fin='2025-11-30'))
+
+    # Hueco de varias semanas y un pico, pasando por el control de calidad
+    df = pd.concat([_serie('2025-06-01', '2025-06-20', '1D', 4), _serie('2025-07-20', '2025-08-10', '1D', 5)],
+                   ignore_index=True)
+    df.loc[5, 'elevacion_piezometrica'] += 25
+    df = control_calidad(df.assign(id_instrumento='SINT-HUECO'))
+    casos.append(dict(nombre='hueco_y_pico', df=df, df_precip=None,
+                      fecha_inicio='2025-06-01', fecha_fin='2025-08-10'))
+
+    # Pocos puntos (sin spline) y un único punto
+    casos.append(dict(nombre='tres_puntos', df=_serie('2025-11-10', '2025-11-12', '1D', 6), df_precip=None,
+                      fecha_inicio='2025-11-01', fecha_fin='2025-11-30'))
+    casos.append(dict(nombre='un_punto', df=_serie('2025-11-15 10:00', '2025-11-15 10:00', '1D', 7), df_precip=None,
+                      fecha_inicio='2025-11-01', fecha_fin='2025-11-30'))
+
+    return casos
+
+
+def renderizar_caso(plot_data, caso):
+    """
+    Genera el PNG de un caso con los estilos de producción ('bmh') y la fuente fija.
+
+    Retorna:
+        tuple: (bytes del PNG o None, tiempo de render en segundos)
+    """
+    plt = importar_matplotlib()[0]
+    import matplotlib
+
+    # Cada caso parte de los estilos de producción: plot_data aplica 'bmh' globalmente
+    # después de crear la figura, así que en el reporte toda figura salvo la primera
+    # se crea ya con 'bmh'
+    with matplotlib.rc_context():
+        matplotlib.style.use('default')
+        matplotlib.style.use('bmh')
+        matplotlib.rcParams['font.family'] = 'sans-serif'
+        matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+        inicio = time.perf_counter()
+        fig = plot_data(
+            caso['df'],
+            caso['df_precip'],
+            tabla=f"SINT-{caso['nombre']}",
+            fecha_inicio=caso['fecha_inicio'],
+            fecha_fin=caso['fecha_fin'],
+            layout_eje_x=calcular_layout_plotter(plot_data, caso['fecha_inicio'], caso['fecha_fin'])
+        )
+        if fig is None:
+            plt.close('all')
+            return None, time.perf_counter() - inicio
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=100)
+        duracion = time.perf_counter() - inicio
+        plt.close('all')
+
+    return buffer.getvalue(), duracion
+
+
+def _luminancia(png):
+    import matplotlib.image as mpimg
+
+    img = mpimg.imread(BytesIO(png) if isinstance(png, bytes) else png)
+    if img.ndim == 3:
+        img = img[..., :3] @ np.array([0.299, 0.587, 0.114])
+    return img.astype(float)
+
+
+def _suavizar(img):
+    # Promedio 3x3: ignora diferencias de antialiasing de un píxel
+    p = np.pad(img, 1, mode='edge')
+    return sum(p[i:i + img.shape[0], j:j + img.shape[1]] for i in range(3) for j in range(3)) / 9.0
+
+
+def comparar_imagenes(png_nuevo, ruta_referencia, tolerancia_rms=TOLERANCIA_RMS, tolerancia_pixeles=TOLERANCIA_PIXELES):
+    """
+    Compara dos imágenes con tolerancia perceptual.
+
+    Retorna:
+        tuple: (equivalentes, rms, fracción de píxeles distintos). Si los tamaños
+               no coinciden, rms y fracción son None.
+    """
+    nueva, referencia = _luminancia(png_nuevo), _luminancia(ruta_referencia)
+    if nueva.shape != referencia.shape:
+        return False, None, None
+
+    diferencia = np.abs(_suavizar(nueva) - _suavizar(referencia))
+    rms = float(np.sqrt(np.mean(diferencia ** 2)))
+    fraccion = float(np.mean(diferencia > 0.1))
+    return rms <= tolerancia_rms and fraccion <= tolerancia_pixeles, rms, fraccion
+
+
+def ejecutar_regresion(directorio=DIRECTORIO_REFERENCIA, actualizar=False,
+                       tolerancia_rms=TOLERANCIA_RMS, tolerancia_pixeles=TOLERANCIA_PIXELES):
+    """
+    Renderiza el corpus con ambos plotters, compara con las referencias y guarda
+    tiempos y tamaños en <directorio>/resultados.csv.
+
+    Parámetros:
+        directorio         : Carpeta de los PNG de referencia
+        actualizar         : Reemplazar las referencias por las imágenes nuevas (sin esta
+                             opción, un caso sin referencia se informa como 'SIN REFERENCIA')
+        tolerancia_rms     : RMS máximo de luminancia (0-1)
+        tolerancia_pixeles : Fracción máxima de píxeles distintos
+
+    Retorna:
+        list: Un dict por caso (caso, plotter, tiempo_ms, tamano_kb, rms, pixeles, estado)
+    """
+    from .plotter_abiertos import plot_data as plot_abiertos
+    from .plotter_cerrados import plot_data as plot_cerrados
+
+    os.makedirs(directorio, exist_ok=True)
+    resultados = []
+
+    for nombre_plotter, plot_data in (('abiertos', plot_abiertos), ('cerrados', plot_cerrados)):
+        for caso in corpus_sintetico():
+            png, duracion = renderizar_caso(plot_data, caso)
+            ruta = os.path.join(directorio, f"{nombre_plotter}_{caso['nombre']}.png")
+            fila = dict(caso=caso['nombre'], plotter=nombre_plotter, tiempo_ms=round(duracion * 1000, 1),
+                        tamano_kb=round(len(png) / 1024, 1) if png else 0, rms=None, pixeles=None)
+
+            if png is None:
+                fila['estado'] = 'SIN GRÁFICO'
+            elif actualizar:
+                with open(ruta, 'wb') as f:
+                    f.write(png)
+                fila['estado'] = 'REFERENCIA'
+            elif not os.path.exists(ruta):
+                # Sin referencia no hay con qué comparar: se informa como fallo
+                fila['estado'] = 'SIN REFERENCIA'
+            else:
+                iguales, fila['rms'], fila['pixeles'] = comparar_imagenes(png, ruta, tolerancia_rms, tolerancia_pixeles)
+                fila['estado'] = 'OK' if iguales else 'DIFERENTE'
+
+                # La imagen nueva se guarda junto a la referencia solo si difiere, para revisarla
+                ruta_nueva = os.path.join(directorio, f"{nombre_plotter}_{caso['nombre']}_nuevo.png")
+                if iguales:
+                    if os.path.exists(ruta_nueva):
+                        os.remove(ruta_nueva)
+                else:
+                    with open(ruta_nueva, 'wb') as f:
+                        f.write(png)
+
+            resultados.append(fila)
+
+    with open(os.path.join(directorio, 'resultados.csv'), 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=list(resultados[0]))
+        escritor.writeheader()
+        escritor.writerows(resultados)
+
+    print("\n" + "="*72)
+    print(f"{'Caso':<24}{'Plotter':<10}{'ms':>8}{'KB':>8}{'RMS':>10}  Estado")
+    print("="*72)
+    for fila in resultados:
+        rms = f"{fila['rms']:.4f}" if fila['rms'] is not None else '-'
+        print(f"{fila['caso']:<24}{fila['plotter']:<10}{fila['tiempo_ms']:>8}{fila['tamano_kb']:>8}{rms:>10}  {fila['estado']}")
+
+    return resultados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Regresión visual y rendimiento de los gráficos")
+    parser.add_argument('--actualizar', action='store_true', help="Reemplazar las imágenes de referencia")
+    parser.add_argument('--directorio', default=DIRECTORIO_REFERENCIA, help="Carpeta de las imágenes de referencia")
+    parser.add_argument('--tolerancia-rms', type=float, default=TOLERANCIA_RMS)
+    parser.add_argument('--tolerancia-pixeles', type=float, default=TOLERANCIA_PIXELES)
+    args = parser.parse_args()
+
+    resultados = ejecutar_regresion(args.directorio, args.actualizar, args.tolerancia_rms, args.tolerancia_pixeles)
+    sys.exit(1 if any(fila['estado'] in ESTADOS_FALLO for fila in resultados) else 0)
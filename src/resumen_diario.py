@@ -0,0 +1,178 @@
+from datetime import date, datetime, timedelta
+
+from .db_connection import execute_command, execute_query
+
+# Tabla de resumen diario por instrumento, mantenida por este proyecto
+TABLA_RESUMEN = '"MV_PIEZOMETROS".pz_abiertos_diario'
+
+# A partir de este rango (días) los gráficos solo necesitan resolución diaria
+DIAS_MINIMOS_RESUMEN = 365
+
+# Días ya resumidos que se recalculan en cada actualización, para recoger lecturas
+# cargadas o corregidas con atraso
+DIAS_REVISION = 30
+
+_SQL_CREAR = f'''
+    CREATE TABLE IF NOT EXISTS {TABLA_RESUMEN} (
+        id_instrumento text NOT NULL,
+        fecha date NOT NULL,
+        elev_min double precision,
+        elev_max double precision,
+        elev_media double precision,
+        elev_ultima double precision,
+        n_lecturas integer NOT NULL,
+        PRIMARY KEY (id_instrumento, fecha)
+    )
+'''
+
+# Recalcula los días desde %s (incluido) y los inserta o actualiza.
+# elevacion_piezometrica se convierte a número de forma segura, igual que en process_data.
+_SQL_REFRESCAR = f'''
+    WITH lecturas AS (
+        SELECT
+            id_instrumento,
+            fecha::date AS fecha,
+            hora,
+            CASE WHEN elevacion_piezometrica::text ~ '^\\s*-?[0-9]+(\\.[0-9]+)?\\s*$'
+                 THEN elevacion_piezometrica::text::double precision END AS elevacion
+        FROM "MV_PIEZOMETROS".pz_abiertos
+        WHERE "fecha" >= %s
+    )
+    INSERT INTO {TABLA_RESUMEN}
+        (id_instrumento, fecha, elev_min, elev_max, elev_media, elev_ultima, n_lecturas)
+    SELECT
+        id_instrumento,
+        fecha,
+        MIN(elevacion),
+        MAX(elevacion),
+        AVG(elevacion),
+        (ARRAY_AGG(elevacion ORDER BY hora DESC NULLS LAST))[1],
+        COUNT(*)
+    FROM lecturas
+    WHERE elevacion IS NOT NULL
+    GROUP BY id_instrumento, fecha
+    ON CONFLICT (id_instrumento, fecha) DO UPDATE SET
+        elev_min = EXCLUDED.elev_min,
+        elev_max = EXCLUDED.elev_max,
+        elev_media = EXCLUDED.elev_media,
+        elev_ultima = EXCLUDED.elev_ultima,
+        n_lecturas = EXCLUDED.n_lecturas
+'''
+
+
+def crear_resumen_diario(conexion):
+    """
+    Crea la tabla de resumen diario si no existe.
+
+    Retorna:
+        bool: True si la tabla existe o se creó
+    """
+    return execute_command(conexion, _SQL_CREAR) is not None
+
+
+def refrescar_resumen_diario(conexion, desde=None, dias_revision=DIAS_REVISION):
+    """
+    Actualiza de forma incremental el resumen diario (mín, máx, media y última elevación
+    por instrumento y día).
+
+    Sin 'desde', se recalcula a partir del último día ya resumido menos dias_revision días,
+    para incluir lecturas cargadas o corregidas después del último refresco. Si la tabla
+    está vacía se resume todo el histórico. Correcciones más antiguas se recogen pasando 'desde'.
+
+    Parámetros:
+        conexion      : Conexión a la base de datos PostgreSQL
+        desde         : Fecha ('YYYY-MM-DD') desde la que recalcular, opcional
+        dias_revision : Días ya resumidos que se vuelven a calcular cuando no se indica 'desde'
+
+    Retorna:
+        int: Número de filas (instrumento, día) insertadas o actualizadas, o None si hubo error
+    """
+    if not crear_resumen_diario(conexion):
+        return None
+
+    if desde is None:
+        result, _ = execute_query(conexion, f'SELECT MAX(fecha) FROM {TABLA_RESUMEN}')
+        if result and result[0][0] is not None:
+            desde = _a_fecha(result[0][0]) - timedelta(days=dias_revision)
+        else:
+            desde = '1900-01-01'
+
+    # Solo se transfiere el número de filas, no las filas resumidas
+    filas = execute_command(conexion, _SQL_REFRESCAR, (desde,))
+    if filas is None:
+        print("✗ No se pudo actualizar el resumen diario")
+        return None
+
+    print(f"✓ Resumen diario actualizado desde {desde}: {filas} filas")
+    return filas
+
+
+def _a_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def usar_resumen(fecha_inicio, fecha_fin, dias_minimos=DIAS_MINIMOS_RESUMEN):
+    """
+    Indica si el rango pedido es lo bastante largo para graficar con el resumen diario.
+    """
+    return (_a_fecha(fecha_fin) - _a_fecha(fecha_inicio)).days >= dias_minimos
+
+
+def consultar_piezometros(conexion, fecha_inicio, fecha_fin, instrumentos=None, dias_minimos=DIAS_MINIMOS_RESUMEN):
+    """
+    Consulta las lecturas de piezómetros eligiendo automáticamente la fuente:
+    datos crudos para rangos cortos y el resumen diario para rangos largos.
+
+    Las columnas son las mismas en ambos casos (id_instrumento, fecha, hora,
+    elevacion_piezometrica), así que el resultado se procesa igual con process_data.
+    Con el resumen, la elevación es la media diaria a las 00:00 y se agregan elev_min y elev_max.
+    Si el resumen no está disponible se usan los datos crudos.
+
+    Parámetros:
+        conexion     : Conexión a la base de datos PostgreSQL
+        fecha_inicio : Fecha inicial ('YYYY-MM-DD')
+        fecha_fin    : Fecha final ('YYYY-MM-DD')
+        instrumentos : Lista de instrumentos a consultar. None = todos
+        dias_minimos : Rango (días) a partir del cual se usa el resumen diario
+
+    Retorna:
+        tuple: (result, columns) como execute_query
+    """
+    filtro = ''
+    params = [fecha_inicio, fecha_fin]
+    if instrumentos is not None:
+        filtro = 'AND id_instrumento = ANY(%s)'
+        params.append(list(instrumentos))
+
+    if usar_resumen(fecha_inicio, fecha_fin, dias_minimos):
+        query_resumen = f'''
+            SELECT
+                id_instrumento,
+                fecha,
+                TIME '00:00' AS hora,
+                elev_media AS elevacion_piezometrica,
+                elev_min,
+                elev_max
+            FROM {TABLA_RESUMEN}
+            WHERE fecha BETWEEN %s AND %s
+            {filtro} '''
+        result, columns = execute_query(conexion, query_resumen, params)
+        if columns is not None:
+            print("ℹ️ Rango largo: usando resumen diario")
+            return result, columns
+        print("⚠️ Resumen diario no disponible, usando datos crudos")
+
+    query_pz = f'''
+        SELECT
+            id_instrumento,
+            fecha,
+            hora,
+            elevacion_piezometrica
+        FROM "MV_PIEZOMETROS".pz_abiertos
+        WHERE "fecha" BETWEEN %s AND %s
+        {filtro} '''
+    return execute_query(conexion, query_pz, params)
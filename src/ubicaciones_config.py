@@ -1,107 +1,8 @@
+from .registro_instrumentos import cargar_registro
 
+# Ubicación (hoja, celda) de cada instrumento en el reporte Excel.
+# Se genera desde el registro de instrumentos (src/instrumentos.csv), que es donde se editan.
 ubicaciones = {
-
-      #=========== SMl C915 ===========#
-    "PA22-01-T": ("PA22-01-T", "C20"),
-    "PA22-02-T": ("PA22-02-T", "C20"),
-    "PA22-06-T": ("PA22-06-T", "C20"),
-    "PA22-07-T": ("PA22-07-T", "C20"),
-    "PA22-09-T": ("PA22-09-T", "C20"),
-    "PA22-10-T": ("PA22-10-T", "C20"),
-    "PA22-12-T": ("PA22-12-T", "C20"),
-
-    "PC22-03-T-S1": ("PC22-03-T", "C13"), 
-    "PC22-03-T-S2": ("PC22-03-T", "C30"),
-    "PC22-04-T-S1": ("PC22-04-T", "C13"),
-    "PC22-04-T-S2": ("PC22-04-T", "C30"),
-    "PC22-05-T-S3": ("PC22-05-T", "C20"),
-    "PC22-08-T-S2": ("PC22-08-T", "C13"),
-    "PC22-08-T-S3": ("PC22-08-T", "C30"),
-    "PC22-14-T-S1": ("PC22-14-T", "C20"),
-
-    #=========== SML DRT 2023 ==========#
-    "PC23-01-T-S1": ("PC23-01-T", "C13"),
-    "PC23-01-T-S2": ("PC23-01-T", "C30"),
-    "PC23-02-T-S1": ("PC23-02-T_PC23-02A-T", "C13"),
-    "PC23-02A-T-S2": ("PC23-02-T_PC23-02A-T", "C30"),
-    "PC23-04-T-S1": ("PC23-04-T", "C13"),
-    "PC23-04-T-S2": ("PC23-04-T", "C30"),
-    "PC23-05-T-S1": ("PC23-05-T", "C20"),
-    "PC23-06-T-S1": ("PC23-06-T", "C13"),
-    "PC23-06-T-S2": ("PC23-06-T", "C30"),
-    "PC23-07-T-S1": ("PC23-07-T", "C13"),
-    "PC23-07-T-S2": ("PC23-07-T", "C30"),
-    "PC23-09-T-S1": ("PC23-09-T", "C13"),
-    "PC23-09-T-S2": ("PC23-09-T", "C30"),
-    "PC23-10-T-S1": ("PC23-10-T", "C13"),
-    "PC23-10-T-S2": ("PC23-10-T", "C30"),
-    "PC23-15A-T-S1": ("PC23-15A-T_PC23-15B-T", "C13"),
-    "PC23-15B-T-S2": ("PC23-15A-T_PC23-15B-T", "C30"),
-    "PC23-16-T-S1": ("PC23-16-T", "C13"),
-    "PC23-16-T-S2": ("PC23-16-T", "C30"),
-    "PC23-19-T-S1": ("PC23-19-T", "C13"),
-    "PC23-19-T-S2": ("PC23-19-T", "C30"),
-    "PC23-23-T-S1": ("PC23-23-T", "C13"),
-    "PC23-23-T-S2": ("PC23-23-T", "C30"),
-    "PC23-24-T-S1": ("PC23-24-T", "C13"),
-    "PC23-24-T-S2": ("PC23-24-T", "C30"),
-    "PC23-25-T-S1": ("PC23-25-T", "C13"),
-    "PC23-25-T-S2": ("PC23-25-T", "C30"),
-    "PC23-26-T-S1": ("PC23-26-T", "C13"),
-    "PC23-26-T-S2": ("PC23-26-T", "C30"),
-
-    "PA23-03-T": ("PA23-03-T", "C20"),   
-    "PA23-08-T": ("PA23-08-T", "C20"),
-    "PA23-11-T": ("PA23-11-T", "C20"),
-    "PA23-12-T": ("PA23-12-T", "C20"),
-    "PA23-13-T": ("PA23-13-T", "C20"),
-    "PA23-14-T": ("PA23-14-T", "C20"),
-    "PA23-17A-T": ("PA23-17A-T", "C20"),
-    "PA23-18-T": ("PA23-18-T", "C20"),
-    "PA23-20A-T": ("PA23-20A-T", "C20"),
-    "PA23-21-T": ("PA23-21-T", "C20"),
-    "PA23-22-T": ("PA23-22-T", "C20"),
-    "PA23-27-T": ("PA23-27-T", "C20"),
-    "PA23-28-T": ("PA23-28-T", "C20"),
-    "PA23-29-T": ("PA23-29-T", "C20"),
-    "PA23-30-T": ("PA23-30-T", "C20"),
-
-    #=========== SML DRT 2024 ==========#
-    "PA24-01-A-T": ("PA24-01-A-T", "C20"),
-    "PA24-01-S": ("PA24-01-S", "C20"),
-    "PA24-02-A-T": ("PA24-02-A-T", "C20"),
-    "PA24-02-S": ("PA24-02-S", "C20"),
-    "PA24-03-A-T": ("PA24-03-A-T", "C20"),
-    "PA24-03-S": ("PA24-03-S", "C20"),
-    "PA24-04-S": ("PA24-04-S", "C20"),
-    "PA24-05-S": ("PA24-05-S", "C20"),
-    "PA24-05-A-T": ("PA24-05-A-T", "C20"),
-    "PA24-10-A-T": ("PA24-10-A-T", "C20"),
-    "PA24-10-T": ("PA24-10-T", "C20"),
-    "PA24-11-T": ("PA24-11-T", "C20"),
-    "PA24-28-T": ("PA24-28-T", "C20"),
-    "PA24-FT-128-T": ("PA24-FT-128-T", "C20"),
-
-    "PA24-01-T": ("PA24-01-T", "C20"),
-    "PA24-02-T": ("PA24-02-T", "C20"),
-    "PA24-03-T": ("PA24-03-T", "C20"),
-    "PA24-04-A-T": ("PA24-04A-T", "C20"),
-    "PA24-05-T": ("PA24-05-T", "C20"),
-    "PA24-06-T": ("PA24-06-T", "C20"),
-    "PA24-07-T": ("PA24-07-T", "C20"),
-    "PA24-08-T": ("PA24-08-T", "C20"),
-    "PA24-09-T": ("PA24-09-T", "C20"),
-    "PA24-12-T": ("PA24-12-T", "C20"),
-
-    "PC24-03-T-S1": ("PC24-03-T", "C13"),
-    "PC24-03-T-S2": ("PC24-03-T", "C25"),
-    "PC24-03-T-S3": ("PC24-03-T", "C35"),
-    "PC24-04-T-S1": ("PC24-04-T", "C13"),
-    "PC24-04-T-S2": ("PC24-04-T", "C30"),
-
-    "PA24-05-T": ("PA24-05-T", "C20"),
-    "PA24-09-T": ("PA24-09-T", "C20")
-
-
-
-}
\ No newline at end of file
+    instrumento.id_instrumento: (instrumento.hoja, instrumento.celda)
+    for instrumento in cargar_registro().values()
+}
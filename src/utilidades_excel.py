@@ -1,15 +1,326 @@
+import hashlib
 import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image
-import matplotlib.pyplot as plt
+from openpyxl.styles import Border, Side
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.utils.cell import coordinate_to_tuple
 
-def guardar_graficos_en_lote(graficos_info, excel_path):
+# Espacios de nombres del formato .xlsx usados para leer las imágenes ancladas
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_XDR = "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing"
+NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+
+def aplicar_borde_derecho(ws, min_row, max_row, col, cache=None):
+    """
+    Aplica un borde derecho medio a un rango de celdas conservando los bordes existentes.
+
+    En lugar de crear un objeto Border por celda, se crea un único borde nuevo por
+    cada borde distinto ya presente en el rango (normalmente uno o dos) y se reutiliza
+    su índice en la tabla de estilos compartida del libro.
+
+    Parámetros:
+        ws      : Hoja de openpyxl
+        min_row : Fila inicial (incluida)
+        max_row : Fila final (incluida)
+        col     : Índice de columna (1 = A)
+        cache   : Diccionario {borderId original: borderId nuevo} compartido entre hojas
+    """
+    if cache is None:
+        cache = {}
+
+    bordes = ws.parent._borders
+    medium_right = Side(border_style="medium", color="000000")
+
+    for row in range(min_row, max_row + 1):
+        cell = ws.cell(row=row, column=col)
+        if cell._style is None:  # Celda nueva sin estilo asignado
+            cell._style = StyleArray()
+        border_id = cell._style.borderId
+
+        if border_id not in cache:
+            # Mantener los bordes existentes y cambiar solo el derecho a "medium"
+            actual = bordes[border_id]
+            nuevo = Border(
+                left=actual.left,
+                right=medium_right,
+                top=actual.top,
+                bottom=actual.bottom
+            )
+            cache[border_id] = bordes.add(nuevo)
+
+        cell._style.borderId = cache[border_id]
+
+
+def aplicar_bordes_en_lote(wb, hojas, min_row, max_row, col):
+    """
+    Aplica el borde derecho medio en varias hojas de un libro ya abierto (sin guardar).
+
+    Parámetros:
+        wb      : Libro de openpyxl
+        hojas   : Lista de nombres de hojas
+        min_row : Fila inicial (incluida)
+        max_row : Fila final (incluida)
+        col     : Índice de columna (1 = A)
+
+    Retorna:
+        int: Número de hojas formateadas
+    """
+    cache = {}
+    aplicadas = 0
+
+    for hoja in hojas:
+        if hoja not in wb.sheetnames:
+            print(f"  ⚠️ Hoja '{hoja}' no existe. Omitiendo bordes")
+            continue
+        aplicar_borde_derecho(wb[hoja], min_row, max_row, col, cache)
+        aplicadas += 1
+
+    return aplicadas
+
+
+def bordes_aplicados(excel_path, hojas, min_row, max_row, col):
+    """
+    Indica si el borde derecho medio ya está en todo el rango de las hojas existentes.
+
+    El libro se lee en modo solo lectura (sin cargar imágenes ni todo el contenido), así
+    que rehacer un reporte sin cambios no obliga a abrir y guardar el Excel por el formato.
+
+    Parámetros:
+        excel_path : Ruta del archivo Excel
+        hojas      : Lista de nombres de hojas (las que no existen se ignoran)
+        min_row    : Fila inicial (incluida)
+        max_row    : Fila final (incluida)
+        col        : Índice de columna (1 = A)
+
+    Retorna:
+        bool: True si no hace falta aplicar los bordes
+    """
+    try:
+        wb = load_workbook(excel_path, read_only=True)
+    except Exception:
+        return False
+
+    try:
+        for hoja in hojas:
+            if hoja not in wb.sheetnames:
+                continue
+
+            revisadas = 0
+            for (cell,) in wb[hoja].iter_rows(min_row=min_row, max_row=max_row, min_col=col, max_col=col):
+                borde = getattr(cell, 'border', None)  # Las celdas vacías no tienen estilo
+                if borde is None or borde.right is None or borde.right.style != 'medium':
+                    return False
+                revisadas += 1
+
+            # La hoja termina antes de max_row: las filas que faltan no tienen borde
+            if revisadas < max_row - min_row + 1:
+                return False
+    finally:
+        wb.close()
+
+    return True
+
+
+def _indices_celda(cell):
+    """Convierte una celda ('C20') en índices base 0 (columna, fila), como los del anchor."""
+    row, col = coordinate_to_tuple(cell)
+    return col - 1, row - 1
+
+
+def _hash_bytes(datos):
+    return hashlib.sha1(datos).hexdigest()
+
+
+def _leer_relaciones(zf, ruta_xml):
+    """Lee el .rels de una parte del paquete: {rId: (ruta absoluta del destino, tipo)}."""
+    carpeta, nombre = posixpath.split(ruta_xml)
+    ruta_rels = posixpath.join(carpeta, "_rels", nombre + ".rels")
+    if ruta_rels not in zf.namelist():
+        return {}
+
+    relaciones = {}
+    for rel in ET.fromstring(zf.read(ruta_rels)).iter(f"{{{NS_PKG_REL}}}Relationship"):
+        destino = rel.get("Target")
+        if destino.startswith("/"):
+            destino = destino.lstrip("/")
+        else:
+            destino = posixpath.normpath(posixpath.join(carpeta, destino))
+        relaciones[rel.get("Id")] = (destino, rel.get("Type", ""))
+    return relaciones
+
+
+def _indice_imagenes(excel_path):
+    """
+    Recorre libro -> hojas -> dibujos -> imágenes dentro del .xlsx.
+
+    Retorna:
+        tuple: (hojas, imagenes, usos)
+            imagenes : {(hoja, col_idx, row_idx): (hash sha1, ruta del archivo de imagen en el zip)}
+            usos     : {ruta del archivo de imagen: número de anclas que la muestran}
+        Si el archivo no se puede leer retorna (None, {}, {}).
+    """
+    hojas = set()
+    imagenes = {}
+    usos = {}
+
+    try:
+        with zipfile.ZipFile(excel_path) as zf:
+            rels_libro = _leer_relaciones(zf, "xl/workbook.xml")
+            libro = ET.fromstring(zf.read("xl/workbook.xml"))
+
+            for hoja in libro.iter(f"{{{NS_MAIN}}}sheet"):
+                nombre = hoja.get("name")
+                hojas.add(nombre)
+                ruta_hoja = rels_libro.get(hoja.get(f"{{{NS_REL}}}id"), (None, ""))[0]
+                if ruta_hoja is None:
+                    continue
+
+                for ruta_dibujo, tipo in _leer_relaciones(zf, ruta_hoja).values():
+                    if not tipo.endswith("/drawing"):
+                        continue
+
+                    rels_dibujo = _leer_relaciones(zf, ruta_dibujo)
+                    dibujo = ET.fromstring(zf.read(ruta_dibujo))
+
+                    for ancla in dibujo:
+                        desde = ancla.find(f"{{{NS_XDR}}}from")
+                        blip = ancla.find(f".//{{{NS_A}}}blip")
+                        if desde is None or blip is None:
+                            continue
+
+                        ruta_media = rels_dibujo.get(blip.get(f"{{{NS_REL}}}embed"), (None, ""))[0]
+                        if ruta_media is None:
+                            continue
+
+                        col_idx = int(desde.find(f"{{{NS_XDR}}}col").text)
+                        row_idx = int(desde.find(f"{{{NS_XDR}}}row").text)
+                        imagenes[(nombre, col_idx, row_idx)] = (_hash_bytes(zf.read(ruta_media)), ruta_media)
+                        usos[ruta_media] = usos.get(ruta_media, 0) + 1
+
+    except Exception as e:
+        print(f"⚠️ No se pudieron leer las imágenes existentes de {excel_path}: {e}")
+        return None, {}, {}
+
+    return hojas, imagenes, usos
+
+
+def indice_imagenes_excel(excel_path):
+    """
+    Lee directamente del archivo .xlsx (sin cargarlo con openpyxl) el hash de cada
+    imagen anclada en cada hoja.
+
+    Parámetros:
+        excel_path : Ruta del archivo Excel
+
+    Retorna:
+        tuple: (hojas, imagenes)
+            hojas    : Conjunto con los nombres de las hojas del libro
+            imagenes : {(hoja, col_idx, row_idx): hash sha1 del archivo de imagen}
+        Si el archivo no se puede leer retorna (None, {}).
+    """
+    hojas, imagenes, _ = _indice_imagenes(excel_path)
+    return hojas, {clave: hash_imagen for clave, (hash_imagen, _) in imagenes.items()}
+
+
+def planificar_actualizacion(graficos_info, excel_path):
+    """
+    Clasifica los gráficos según cómo deben escribirse en el Excel, comparando el hash
+    de cada PNG con la imagen ya anclada en su celda.
+
+    Parámetros:
+        graficos_info : Lista de tuplas (png_path, sheet_name, cell, inst_name)
+        excel_path    : Ruta del archivo Excel
+
+    Retorna:
+        tuple: (plan, reemplazos, sin_cambios, omitidos)
+            plan        : {sheet_name: [(png_path, cell, inst_name), ...]} gráficos nuevos en su
+                          celda, que requieren abrir el libro con openpyxl
+            reemplazos  : {ruta de la imagen en el zip: (png_path, sheet_name, cell, inst_name)}
+                          gráficos que cambiaron y cuya imagen PNG anclada (usada solo por esa
+                          celda) se puede sustituir directamente en el archivo
+            sin_cambios : Número de gráficos idénticos al ya insertado
+            omitidos    : Número de gráficos cuya hoja no existe
+    """
+    hojas, imagenes, usos = _indice_imagenes(excel_path)
+
+    plan = {}
+    reemplazos = {}
+    sin_cambios = 0
+    omitidos = 0
+
+    for png_path, sheet_name, cell, inst_name in graficos_info:
+        if hojas is not None and sheet_name not in hojas:
+            print(f"  ⚠️ Hoja '{sheet_name}' no existe. Omitiendo gráfico de {inst_name}")
+            omitidos += 1
+            continue
+
+        col_idx, row_idx = _indices_celda(cell)
+        hash_actual, ruta_media = imagenes.get((sheet_name, col_idx, row_idx), (None, None))
+        if hash_actual is not None:
+            with open(png_path, "rb") as f:
+                if _hash_bytes(f.read()) == hash_actual:
+                    sin_cambios += 1
+                    continue
+
+            # Solo se sustituye en el zip si el archivo es PNG y no lo comparten otras anclas
+            if (ruta_media.lower().endswith(".png") and usos.get(ruta_media) == 1
+                    and ruta_media not in reemplazos):
+                reemplazos[ruta_media] = (png_path, sheet_name, cell, inst_name)
+                continue
+
+        plan.setdefault(sheet_name, []).append((png_path, cell, inst_name))
+
+    return plan, reemplazos, sin_cambios, omitidos
+
+
+def reemplazar_imagenes_excel(excel_path, reemplazos):
+    """
+    Sustituye imágenes ya ancladas escribiendo un nuevo .xlsx en el que todas las partes
+    se copian tal cual salvo los archivos de imagen indicados. No se cargan ni se vuelven
+    a generar las hojas, estilos ni dibujos, así que el resto del libro queda intacto.
+
+    Parámetros:
+        excel_path : Ruta del archivo Excel
+        reemplazos : {ruta de la imagen en el zip: ruta del PNG nuevo}
+    """
+    temporal = excel_path + ".tmp"
+    try:
+        with zipfile.ZipFile(excel_path) as origen, zipfile.ZipFile(temporal, "w") as destino:
+            for info in origen.infolist():
+                if info.filename in reemplazos:
+                    with open(reemplazos[info.filename], "rb") as f:
+                        destino.writestr(info, f.read())
+                else:
+                    destino.writestr(info, origen.read(info.filename))
+        os.replace(temporal, excel_path)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def guardar_graficos_en_lote(graficos_info, excel_path, bordes=None, incremental=True):
     """
     Inserta múltiples gráficos en Excel (mucho más rápido).
     
+    Los gráficos se agrupan por hoja y, en modo incremental, solo se reemplazan los que
+    cambiaron respecto a la imagen ya anclada en su celda. Si la celda ya tiene imagen, se
+    sustituye únicamente ese archivo dentro del .xlsx; el libro se abre con openpyxl solo
+    para anclar gráficos nuevos o aplicar bordes pendientes.
+    
     Parámetros:
         graficos_info : Lista de tuplas (png_path, sheet_name, cell, inst_name)
         excel_path    : Ruta del archivo Excel
+        bordes        : Diccionario opcional con los argumentos de aplicar_bordes_en_lote
+                        (hojas, min_row, max_row, col). Los bordes se aplican en la misma
+                        apertura del libro, evitando un segundo ciclo de carga/guardado.
+        incremental   : Si es False se reinsertan todos los gráficos aunque no hayan cambiado
     """
     
     print("\n" + "="*50)
@@ -17,71 +328,95 @@ def guardar_graficos_en_lote(graficos_info, excel_path):
     print("="*50)
     
     try:
+        if incremental:
+            plan, reemplazos, sin_cambios, omitidos = planificar_actualizacion(graficos_info, excel_path)
+        else:
+            plan, reemplazos, sin_cambios, omitidos = {}, {}, 0, 0
+            for png_path, sheet_name, cell, inst_name in graficos_info:
+                plan.setdefault(sheet_name, []).append((png_path, cell, inst_name))
+
+        if sin_cambios > 0:
+            print(f"  = {sin_cambios} gráficos sin cambios (se conservan)")
+
+        # Gráficos que cambiaron en una celda que ya tiene imagen: se sustituye solo el
+        # archivo de imagen dentro del .xlsx, sin pasar por openpyxl
+        if reemplazos:
+            reemplazar_imagenes_excel(
+                excel_path, {ruta: png_path for ruta, (png_path, _, _, _) in reemplazos.items()})
+            for png_path, sheet_name, cell, inst_name in reemplazos.values():
+                print(f"  ✓ {inst_name} → {sheet_name}:{cell} (imagen reemplazada)")
+
+        if not plan and (not bordes or bordes_aplicados(excel_path, **bordes)):
+            print("\n✓ No hay gráficos nuevos ni formato pendiente. El libro no se vuelve a generar")
+            if omitidos > 0:
+                print(f"⚠️ Gráficos omitidos: {omitidos}")
+            return
+
         wb = load_workbook(excel_path)
         insertados = 0
-        omitidos = 0
         
-        for png_path, sheet_name, cell, inst_name in graficos_info:
-            try:
-                # Verificar si la hoja existe
-                if sheet_name not in wb.sheetnames:
+        for sheet_name, graficos in plan.items():
+            # Verificar si la hoja existe
+            if sheet_name not in wb.sheetnames:
+                for _, _, inst_name in graficos:
                     print(f"  ⚠️ Hoja '{sheet_name}' no existe. Omitiendo gráfico de {inst_name}")
-                    omitidos += 1
-                    continue
-                
-                ws = wb[sheet_name]
-                
-                # ELIMINAR solo imágenes en la celda específica (si existen)
-                col_idx = ord(cell[0].upper()) - ord('A')
-                row_idx = int(''.join(filter(str.isdigit, cell))) - 1
-                
-                imagenes_a_eliminar = []
-                for img in ws._images:
-                    try:
-                        # Intentar acceder al anchor de forma segura
-                        if hasattr(img, 'anchor') and hasattr(img.anchor, '_from'):
-                            # Si tiene el formato correcto, verificar posición
-                            if (hasattr(img.anchor._from, 'col') and 
-                                hasattr(img.anchor._from, 'row') and
-                                img.anchor._from.col == col_idx and 
-                                img.anchor._from.row == row_idx):
-                                imagenes_a_eliminar.append(img)
-                        else:
-                            # Si no tiene el formato esperado, marcarlo para eliminar por seguridad
-                            # (esto evita imágenes corruptas que causan problemas)
+                omitidos += len(graficos)
+                continue
+            
+            ws = wb[sheet_name]
+            
+            for png_path, cell, inst_name in graficos:
+                try:
+                    # ELIMINAR solo imágenes en la celda específica (si existen)
+                    col_idx, row_idx = _indices_celda(cell)
+                    
+                    imagenes_a_eliminar = []
+                    for img in ws._images:
+                        try:
+                            # Intentar acceder al anchor de forma segura
+                            if hasattr(img, 'anchor') and hasattr(img.anchor, '_from'):
+                                # Si tiene el formato correcto, verificar posición
+                                if (hasattr(img.anchor._from, 'col') and 
+                                    hasattr(img.anchor._from, 'row') and
+                                    img.anchor._from.col == col_idx and 
+                                    img.anchor._from.row == row_idx):
+                                    imagenes_a_eliminar.append(img)
+                        except Exception as e_img:
+                            # Si cualquier cosa falla al verificar la imagen, ignorarla
                             pass
-                    except Exception as e_img:
-                        # Si cualquier cosa falla al verificar la imagen, ignorarla
-                        # print(f"    ⚠️ Imagen con formato inválido detectada, omitiendo verificación")
-                        pass
-                
-                # Eliminar las imágenes marcadas
-                for img in imagenes_a_eliminar:
-                    try:
-                        ws._images.remove(img)
-                    except:
-                        pass
-                
-                # Insertar nueva imagen
-                img = Image(png_path)
-                img.width = 17.7 * 37.8
-                img.height = 7 * 37.8
-                ws.add_image(img, cell)
-                
-                print(f"  ✓ {inst_name} → {sheet_name}:{cell}")
-                insertados += 1
-                
-            except Exception as e:
-                print(f"  ✗ Error insertando {inst_name}: {e}")
-                omitidos += 1
+                    
+                    # Eliminar las imágenes marcadas
+                    for img in imagenes_a_eliminar:
+                        try:
+                            ws._images.remove(img)
+                        except:
+                            pass
+                    
+                    # Insertar nueva imagen
+                    img = Image(png_path)
+                    img.width = 17.7 * 37.8
+                    img.height = 7 * 37.8
+                    ws.add_image(img, cell)
+                    
+                    print(f"  ✓ {inst_name} → {sheet_name}:{cell}")
+                    insertados += 1
+                    
+                except Exception as e:
+                    print(f"  ✗ Error insertando {inst_name}: {e}")
+                    omitidos += 1
+        
+        # Aplicar formato en la misma pasada
+        if bordes:
+            hojas_formateadas = aplicar_bordes_en_lote(wb, **bordes)
+            print(f"\n✓ Bordes aplicados en {hojas_formateadas} hojas")
         
         # Guardar Excel UNA SOLA VEZ
         wb.save(excel_path)
-        print(f"\n✓ Gráficos insertados: {insertados}")
+        print(f"\n✓ Gráficos insertados: {insertados} en {len(plan)} hojas")
         if omitidos > 0:
             print(f"⚠️ Gráficos omitidos: {omitidos}")
         
     except Exception as e:
         print(f"✗ Error al abrir/guardar Excel: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()